@@ -0,0 +1,186 @@
+import hashlib
+import json
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .conf import setting
+from .models import CachedResponse
+
+WORD_RE = re.compile(r"[\w']+")
+
+
+def normalize(prompt):
+    # Unicode-aware, so non-Latin and accented prompts keep their words
+    return ' '.join(WORD_RE.findall(unicodedata.normalize('NFKC', prompt).casefold()))
+
+
+def vectorize(text):
+    """
+    Sparse, L2-normalised bag of words and word bigrams. Good enough to match
+    rephrasings like "how can I save money?" / "how do i save money",
+    without an embedding model.
+    """
+    words = text.split()
+    features = Counter(words)
+    features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {term: v / norm for term, v in features.items()}
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(term, 0.0) for term, v in a.items())
+
+
+def split_messages(messages):
+    """Return (system prompt, prompt) for a single-question conversation, else None."""
+    if len(messages) != 2 or messages[0]['role'] != 'system' or messages[1]['role'] != 'user':
+        return None
+    return messages[0]['content'], messages[1]['content']
+
+
+class ResponseCache:
+    """
+    Two-tier cache of assistant replies keyed on model, system prompt and
+    normalised prompt: a bounded in-process LRU in front of CachedResponse
+    rows that expire after ASSISTANT_CACHE_TTL seconds. With
+    ASSISTANT_CACHE_SIMILARITY set, a miss can also be served by the most
+    similar prompt in the LRU tier.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._saved_seconds = 0.0
+        self._miss_seconds = 0.0
+
+    @property
+    def enabled(self):
+        return setting('ASSISTANT_CACHE_ENABLED', True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+            self._saved_seconds = self._miss_seconds = 0.0
+
+    def _keys(self, messages):
+        split = split_messages(messages)
+        if split is None:
+            return None
+        system, prompt = split
+        model = setting('ASSISTANT_LLM_MODEL', '')
+        normalized = normalize(prompt)
+        if not normalized:
+            # Nothing left to key on (only punctuation or symbols)
+            return None
+        scope = hashlib.sha256(json.dumps([model, system]).encode()).hexdigest()
+        key = hashlib.sha256(f"{scope}:{normalized}".encode()).hexdigest()
+        return key, scope, normalized
+
+    def _remember(self, key, scope, normalized, response, expires_at):
+        with self._lock:
+            self._entries[key] = (scope, vectorize(normalized), response, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > setting('ASSISTANT_CACHE_SIZE', 1000):
+                self._entries.popitem(last=False)
+
+    def _from_memory(self, key, scope, normalized, now):
+        threshold = setting('ASSISTANT_CACHE_SIMILARITY', None)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] > now:
+                self._entries.move_to_end(key)
+                return entry[2], 'memory'
+            if entry is not None:
+                del self._entries[key]
+            if not threshold:
+                return None, None
+
+            vector = vectorize(normalized)
+            best, best_score = None, threshold
+            for entry_scope, entry_vector, response, expires_at in self._entries.values():
+                if entry_scope != scope or expires_at <= now:
+                    continue
+                score = cosine(vector, entry_vector)
+                if score >= best_score:
+                    best, best_score = response, score
+            return (best, 'similar') if best is not None else (None, None)
+
+    def _record(self, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+            if outcome != 'miss':
+                self._saved_seconds += self._average_miss_seconds()
+
+    def _average_miss_seconds(self):
+        misses = self._stats['miss']
+        return self._miss_seconds / misses if misses else 0.0
+
+    async def lookup(self, messages):
+        """Return (response, tier) for a cached reply, or (None, None)."""
+        keys = self._keys(messages) if self.enabled else None
+        if keys is None:
+            return None, None
+        key, scope, normalized = keys
+        now = timezone.now()
+
+        response, tier = self._from_memory(key, scope, normalized, now)
+        if response is None:
+            row = await CachedResponse.objects.filter(key=key, expires_at__gt=now).only('response', 'expires_at').afirst()
+            if row is not None:
+                response, tier = row.response, 'db'
+                self._remember(key, scope, normalized, row.response, row.expires_at)
+        if response is None:
+            self._record('miss')
+            return None, None
+
+        self._record(tier)
+        if tier == 'db':
+            await CachedResponse.objects.filter(key=key).aupdate(hits=F('hits') + 1)
+        return response, tier
+
+    async def store(self, messages, response, elapsed):
+        """Cache a fresh reply that took ``elapsed`` seconds to generate."""
+        keys = self._keys(messages) if self.enabled else None
+        if keys is None:
+            return
+        key, scope, normalized = keys
+        with self._lock:
+            self._miss_seconds += elapsed
+        expires_at = timezone.now() + timedelta(seconds=setting('ASSISTANT_CACHE_TTL', 86400))
+        self._remember(key, scope, normalized, response, expires_at)
+        await CachedResponse.objects.aupdate_or_create(
+            key=key,
+            defaults={'scope': scope, 'prompt': normalized, 'response': response, 'expires_at': expires_at},
+        )
+
+    def metrics(self):
+        with self._lock:
+            hits = self._stats['memory'] + self._stats['db'] + self._stats['similar']
+            lookups = hits + self._stats['miss']
+            return {
+                'lookups': lookups,
+                'hits': {tier: self._stats[tier] for tier in ('memory', 'db', 'similar')},
+                'misses': self._stats['miss'],
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'average_miss_seconds': round(self._average_miss_seconds(), 3),
+                'saved_seconds': round(self._saved_seconds, 3),
+                'memory_entries': len(self._entries),
+            }
+
+
+response_cache = ResponseCache()
+
+
+def purge_expired(now=None):
+    return CachedResponse.objects.filter(expires_at__lte=now or timezone.now()).delete()[0]
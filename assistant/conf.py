@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def setting(name, default):
+    """An ASSISTANT_* setting, falling back to ``default`` when it isn't set."""
+    return getattr(settings, name, default)
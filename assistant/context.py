@@ -0,0 +1,79 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from finance.aggregation import add_months
+from finance.budgets import budget_status
+from finance.cache import shared_cache, versioned_key
+from finance.models import MonthlyRollup, Transaction
+from users.models import CustomUser
+
+CONTEXT_MONTHS = 3
+MAX_RECURRING = 10
+CONTEXT_CACHE_TIMEOUT = 3600
+
+
+def build_context(user_id, today):
+    """
+    Render the user's balance, recent monthly category totals, active
+    budgets and recurring items as short prompt text. Monthly totals come
+    from MonthlyRollup and budgets from the cached budget status, so this
+    never scans the transaction history.
+    """
+    balance = CustomUser.objects.filter(id=user_id).values_list('balance', flat=True).first()
+    lines = [f"Current balance: {balance or 0:.2f}"]
+
+    since = add_months(today.replace(day=1), -(CONTEXT_MONTHS - 1))
+    months = defaultdict(list)
+    rollups = (
+        MonthlyRollup.objects.filter(user_id=user_id, month__gte=since)
+        .order_by('month', 'type', '-total')
+        .values_list('month', 'type', 'category', 'total')
+    )
+    for month, txn_type, category, total in rollups:
+        months[month].append(f"{category} {txn_type} {abs(total):.2f}")
+    if months:
+        lines.append(f"Totals by category, last {CONTEXT_MONTHS} months:")
+        for month, totals in months.items():
+            lines.append(f"- {month:%Y-%m}: " + ", ".join(totals))
+
+    budgets = budget_status(user_id, today)
+    if budgets:
+        lines.append("Active budgets:")
+        for budget in budgets:
+            flag = " (over budget)" if budget['over_budget'] else ""
+            lines.append(
+                f"- {budget['category']}: spent {budget['spent']} of {budget['amount']} "
+                f"until {budget['end_date']}{flag}"
+            )
+
+    recurring = (
+        Transaction.objects.filter(user_id=user_id, recurrence_source__isnull=True)
+        .exclude(recurrence='none')
+        .order_by('-date')
+        .values_list('description', 'amount', 'type', 'category', 'recurrence')[:MAX_RECURRING]
+    )
+    recurring = list(recurring)
+    if recurring:
+        lines.append("Recurring items:")
+        for description, amount, txn_type, category, recurrence in recurring:
+            lines.append(f"- {description or category}: {abs(amount):.2f} {txn_type}, {recurrence}")
+    return "\n".join(lines)
+
+
+def financial_context(user_id):
+    """
+    The user's context snapshot, cached under their finance version so any
+    transaction, budget or category write (see finance.ledger and
+    finance.signals) retires it. A chat turn normally costs cache reads only.
+    """
+    today = timezone.localdate()
+    if not shared_cache():
+        return build_context(user_id, today)
+    key = versioned_key('assistant_context', user_id, today.isoformat())
+    context = cache.get(key)
+    if context is None:
+        context = build_context(user_id, today)
+        cache.set(key, context, CONTEXT_CACHE_TIMEOUT)
+    return context
@@ -0,0 +1,171 @@
+import codecs
+import csv
+import heapq
+import math
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from finance.importer import DATE_FORMATS, column
+
+MAX_MERCHANTS_TRACKED = 200
+TOP_MERCHANTS = 10
+TOP_OUTLIERS = 5
+MAX_CATEGORIES = 15
+# Distinct category names tracked; the rest of a file's categories share one bucket
+MAX_CATEGORIES_TRACKED = 100
+OTHER_CATEGORIES = 'Other categories'
+MAX_MONTHS = 24
+OUTLIER_Z = 3.0
+
+
+def _amount(value):
+    cleaned = value.replace(',', '').replace('€', '').replace('$', '').replace('£', '').strip()
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        return None
+
+
+def _day(value):
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+class CsvDigest:
+    """
+    Single-pass aggregates over a transactions CSV, in memory bounded by
+    MAX_CATEGORIES_TRACKED and the months covered rather than rows: totals per category
+    and month, the biggest merchants (space-saving top-k) and the largest
+    expenses with their z-score against the running (Welford) mean.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+        self.first_day = None
+        self.last_day = None
+        self.totals = {'income': Decimal('0'), 'expense': Decimal('0')}
+        self.categories = defaultdict(lambda: {'income': Decimal('0'), 'expense': Decimal('0')})
+        self.months = defaultdict(lambda: {'income': Decimal('0'), 'expense': Decimal('0')})
+        self.merchants = {}
+        self.merchants_approximate = False
+        self.largest = []
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, row):
+        amount = _amount(column(row, 'amount'))
+        if amount is None:
+            self.skipped += 1
+            return
+        txn_type = column(row, 'type').lower()
+        if txn_type not in ('income', 'expense'):
+            txn_type = 'expense' if amount < 0 else 'income'
+        amount = abs(amount)
+        self.rows += 1
+
+        category = column(row, 'category') or 'Uncategorized'
+        if category not in self.categories and len(self.categories) >= MAX_CATEGORIES_TRACKED:
+            category = OTHER_CATEGORIES
+        self.totals[txn_type] += amount
+        self.categories[category][txn_type] += amount
+
+        day = _day(column(row, 'date'))
+        if day is not None:
+            self.months[day.strftime('%Y-%m')][txn_type] += amount
+            self.first_day = min(self.first_day or day, day)
+            self.last_day = max(self.last_day or day, day)
+
+        if txn_type == 'expense':
+            self._add_expense(amount, column(row, 'description') or category, day)
+
+    def _add_expense(self, amount, merchant, day):
+        value = float(amount)
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+        entry = (value, self._count, merchant, day)
+        if len(self.largest) < TOP_OUTLIERS:
+            heapq.heappush(self.largest, entry)
+        elif value > self.largest[0][0]:
+            heapq.heapreplace(self.largest, entry)
+
+        key = merchant.lower()
+        if key in self.merchants or len(self.merchants) < MAX_MERCHANTS_TRACKED:
+            name, total = self.merchants.get(key, (merchant, Decimal('0')))
+            self.merchants[key] = (name, total + amount)
+        else:
+            # Space-saving: the new merchant takes over the smallest counter
+            smallest = min(self.merchants, key=lambda k: self.merchants[k][1])
+            floor = self.merchants.pop(smallest)[1]
+            self.merchants_approximate = True
+            self.merchants[key] = (merchant, floor + amount)
+
+    def outliers(self):
+        std = math.sqrt(self._m2 / (self._count - 1)) if self._count > 1 else 0.0
+        found = []
+        for value, _seq, merchant, day in sorted(self.largest, reverse=True):
+            z = (value - self._mean) / std if std else 0.0
+            if z >= OUTLIER_Z:
+                found.append((value, merchant, day, z))
+        return found
+
+    def render(self):
+        if not self.rows:
+            return "The file contains no readable transactions."
+
+        lines = [f"Transactions: {self.rows}" + (f" ({self.skipped} unreadable rows skipped)" if self.skipped else "")]
+        if self.first_day:
+            lines.append(f"Period: {self.first_day} to {self.last_day}")
+        lines.append(
+            f"Total income: {self.totals['income']:.2f} | Total expenses: {self.totals['expense']:.2f} | "
+            f"Net: {self.totals['income'] - self.totals['expense']:.2f}"
+        )
+
+        lines.append("By category (income / expenses):")
+        categories = sorted(self.categories.items(), key=lambda item: -(item[1]['income'] + item[1]['expense']))
+        for name, totals in categories[:MAX_CATEGORIES]:
+            lines.append(f"- {name}: {totals['income']:.2f} / {totals['expense']:.2f}")
+        if len(categories) > MAX_CATEGORIES:
+            lines.append(f"- ...and {len(categories) - MAX_CATEGORIES} smaller categories")
+
+        if self.months:
+            lines.append("By month (income / expenses):")
+            months = sorted(self.months.items())
+            if len(months) > MAX_MONTHS:
+                lines.append(f"- ...{len(months) - MAX_MONTHS} earlier months omitted")
+            for month, totals in months[-MAX_MONTHS:]:
+                lines.append(f"- {month}: {totals['income']:.2f} / {totals['expense']:.2f}")
+
+        if self.merchants:
+            lines.append("Top merchants by spending" + (" (approximate):" if self.merchants_approximate else ":"))
+            top = sorted(self.merchants.values(), key=lambda item: -item[1])[:TOP_MERCHANTS]
+            for name, total in top:
+                lines.append(f"- {name}: {total:.2f}")
+
+        outliers = self.outliers()
+        if outliers:
+            lines.append(f"Unusually large expenses (average {self._mean:.2f}):")
+            for value, merchant, day, z in outliers:
+                lines.append(f"- {value:.2f} {merchant}" + (f" on {day}" if day else "") + f" ({z:.1f} std above average)")
+        return "\n".join(lines)
+
+
+def digest_csv(uploaded_file):
+    """Stream ``uploaded_file`` once and return its CsvDigest."""
+    digest = CsvDigest()
+    for row in csv.DictReader(codecs.iterdecode(uploaded_file, 'utf-8-sig')):
+        digest.add(row)
+    return digest
@@ -0,0 +1,188 @@
+import asyncio
+import random
+import threading
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+
+from .conf import setting
+
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+
+EXTRA_HEADERS = {
+    "HTTP-Referer": "http://localhost:3000",
+    "X-Title": "NeoFinance Assistant",
+}
+
+
+class AssistantBusy(Exception):
+    """Raised when no completion slot frees up within ASSISTANT_LLM_QUEUE_TIMEOUT."""
+
+
+def _config():
+    return (
+        setting('ASSISTANT_LLM_API_KEY', None) or 'missing',
+        setting('ASSISTANT_LLM_BASE_URL', 'https://openrouter.ai/api/v1'),
+        setting('ASSISTANT_LLM_TIMEOUT', 60),
+        setting('ASSISTANT_LLM_MAX_CONNECTIONS', 20),
+        setting('ASSISTANT_LLM_CONCURRENCY', 8),
+    )
+
+
+class _ClientState:
+    def __init__(self, config):
+        api_key, base_url, timeout, max_connections, concurrency = config
+        self.config = config
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            # Retries are done in complete() so they share the backoff policy
+            max_retries=0,
+            timeout=timeout,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+                timeout=httpx.Timeout(timeout, connect=5),
+            ),
+        )
+        self.slots = asyncio.Semaphore(concurrency)
+
+
+class _Runner:
+    """
+    A daemon thread running the one event loop that owns the process's
+    client, its connection pool and the concurrency semaphore. Views and
+    jobs run on whatever loop they were given (a fresh one per call under
+    WSGI or async_to_sync), so the upstream calls are handed over to this
+    loop instead of each caller loop building, and leaking, its own pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._state = None
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='assistant-llm', daemon=True).start()
+            return self._loop
+
+    async def state(self):
+        """The current client; only awaited on the runner's loop."""
+        config = _config()
+        if self._state is None or self._state.config != config:
+            # Settings changed (tests, override_settings): swap in a new client
+            previous, self._state = self._state, _ClientState(config)
+            if previous is not None:
+                await previous.client.close()
+        return self._state
+
+    async def run(self, coro):
+        """Await ``coro`` on the runner's loop; cancelling the caller cancels it there too."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._get_loop()))
+
+
+_runner = _Runner()
+
+
+async def _acquire_slot(state):
+    try:
+        await asyncio.wait_for(state.slots.acquire(), setting('ASSISTANT_LLM_QUEUE_TIMEOUT', 10))
+    except asyncio.TimeoutError:
+        raise AssistantBusy("Too many assistant requests in flight")
+
+
+async def _with_retries(call):
+    attempts = setting('ASSISTANT_LLM_MAX_RETRIES', 2) + 1
+    backoff = setting('ASSISTANT_LLM_BACKOFF', 0.5)
+    for attempt in range(attempts):
+        try:
+            return await call()
+        except RETRYABLE_ERRORS:
+            if attempt == attempts - 1:
+                raise
+            # Exponential backoff with full jitter
+            await asyncio.sleep(random.uniform(0, backoff * 2 ** attempt))
+
+
+async def _complete(messages):
+    state = await _runner.state()
+    await _acquire_slot(state)
+    try:
+        completion = await _with_retries(lambda: state.client.chat.completions.create(
+            model=setting('ASSISTANT_LLM_MODEL', 'deepseek/deepseek-r1:free'),
+            messages=messages,
+            extra_headers=EXTRA_HEADERS,
+        ))
+    finally:
+        state.slots.release()
+    return completion.choices[0].message.content
+
+
+async def complete(messages):
+    """
+    Send ``messages`` to the configured model and return the reply text.
+    At most ASSISTANT_LLM_CONCURRENCY completions run at once per process;
+    retryable upstream errors are retried with exponential backoff.
+    """
+    return await _runner.run(_complete(messages))
+
+
+class _Stream:
+    """An open completion stream and the slot it holds, living on the runner's loop."""
+
+    def __init__(self, state, chunks):
+        self.state = state
+        self.chunks = chunks
+        self.iterator = chunks.__aiter__()
+
+    @classmethod
+    async def open(cls, messages):
+        state = await _runner.state()
+        await _acquire_slot(state)
+        try:
+            # Only opening the stream is retried; once chunks flow a failure is final
+            chunks = await _with_retries(lambda: state.client.chat.completions.create(
+                model=setting('ASSISTANT_LLM_MODEL', 'deepseek/deepseek-r1:free'),
+                messages=messages,
+                extra_headers=EXTRA_HEADERS,
+                stream=True,
+            ))
+        except BaseException:
+            state.slots.release()
+            raise
+        return cls(state, chunks)
+
+    async def next_text(self):
+        """The next non-empty piece of text, or None at the end of the reply."""
+        async for chunk in self.iterator:
+            if chunk.choices and chunk.choices[0].delta.content:
+                return chunk.choices[0].delta.content
+        return None
+
+    async def close(self):
+        try:
+            await self.chunks.close()
+        finally:
+            self.state.slots.release()
+
+
+async def stream(messages):
+    """
+    Yield the reply text as the model produces it. The completion slot is
+    held until the generator is exhausted or closed, e.g. when the client
+    disconnects, which also closes the upstream connection.
+    """
+    opened = await _runner.run(_Stream.open(messages))
+    try:
+        while (text := await _runner.run(opened.next_text())) is not None:
+            yield text
+    finally:
+        await _runner.run(opened.close())
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from assistant.stub import make_server
+
+class Command(BaseCommand):
+    help = 'Serve a local OpenAI-compatible stub so the assistant can be load-tested offline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument('--latency', type=float, default=0.5, help='Seconds to wait before each reply')
+        parser.add_argument('--chunk-delay', type=float, default=0.05, help='Seconds between streamed chunks')
+
+    def handle(self, *args, **options):
+        server = make_server(options['host'], options['port'], options['latency'], chunk_delay=options['chunk_delay'])
+        self.stdout.write(self.style.SUCCESS(
+            f"LLM stub on http://{options['host']}:{options['port']}/v1 "
+            f"(set ASSISTANT_LLM_BASE_URL to this)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
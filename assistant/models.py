@@ -1,3 +1,61 @@
+import uuid
+
 from django.db import models
 
-# Create your models here.
+from users.models import CustomUser
+
+
+class CachedResponse(models.Model):
+    """Persistent tier of assistant.cache.ResponseCache."""
+    key = models.CharField(max_length=64, unique=True)
+    # Hash of model + system prompt; similarity lookups stay within one scope
+    scope = models.CharField(max_length=64)
+    prompt = models.TextField()
+    response = models.TextField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.prompt[:80]
+
+
+class Conversation(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='conversations')
+    title = models.CharField(max_length=200, blank=True)
+    # Running summary of every message up to and including summarized_through
+    summary = models.TextField(blank=True)
+    summarized_through = models.PositiveIntegerField(default=0)
+    last_seq = models.PositiveIntegerField(default=0)
+    needs_summary = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-updated_at'], name='conversation_user_updated_idx'),
+            models.Index(fields=['updated_at'], condition=models.Q(needs_summary=True), name='conversation_needs_summary_idx'),
+        ]
+
+    def __str__(self):
+        return self.title or str(self.id)
+
+
+class ConversationMessage(models.Model):
+    ROLE_CHOICES = [('user', 'User'), ('assistant', 'Assistant')]
+
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    seq = models.PositiveIntegerField()
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    content = models.TextField()
+    tokens = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'seq'], name='unique_conversation_seq'),
+        ]
+
+    def __str__(self):
+        return f"{self.role} #{self.seq}"
@@ -0,0 +1,85 @@
+"""
+Minimal OpenAI-compatible chat completions server for offline load tests.
+Point ASSISTANT_LLM_BASE_URL at it (see the run_llm_stub command).
+"""
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    chunk_delay = 0.0
+    reply = "This is a stub reply from the local assistant server."
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        self.server.received.append(body)
+        time.sleep(self.latency)
+        if body.get('stream'):
+            self.stream_reply(body)
+            return
+
+        payload = json.dumps({
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.reply},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def stream_reply(self, body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        words = self.reply.split(' ')
+        for i, word in enumerate(words):
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{
+                    'index': 0,
+                    'delta': {'content': word if i == 0 else f" {word}"},
+                    'finish_reason': 'stop' if i == len(words) - 1 else None,
+                }],
+            }
+            try:
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            time.sleep(self.chunk_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def make_server(host='127.0.0.1', port=8001, latency=0.0, reply=None, chunk_delay=0.0):
+    handler = type('ConfiguredStubHandler', (StubHandler,), {
+        'latency': latency,
+        'chunk_delay': chunk_delay,
+        'reply': reply or StubHandler.reply,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    # Request bodies, for tests that check what was sent upstream
+    server.received = []
+    return server
@@ -0,0 +1,121 @@
+import math
+
+from django.db import transaction as db_transaction
+from django.db.models import Sum
+
+from .conf import setting
+from .models import Conversation, ConversationMessage
+
+CHARS_PER_TOKEN = 4
+# Unsummarized messages read per turn; compaction keeps the real count lower
+RECENT_WINDOW = 50
+MAX_COMPACT_MESSAGES = 40
+TITLE_LENGTH = 80
+
+SUMMARY_PROMPT = (
+    "You keep a running summary of a conversation between a user and Emmanuel, "
+    "a financial assistant. Merge the existing summary with the new messages into "
+    "one concise summary of at most 200 words. Keep the figures, goals and "
+    "decisions the user mentioned."
+)
+
+
+def estimate_tokens(text):
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def get_thread(user_id, conversation_id, first_message):
+    """The user's conversation, a new one when ``conversation_id`` is None, or None if not theirs."""
+    if conversation_id is None:
+        return Conversation.objects.create(user_id=user_id, title=first_message[:TITLE_LENGTH])
+    return Conversation.objects.filter(id=conversation_id, user_id=user_id).first()
+
+
+def build_messages(conversation, system_prompt, message):
+    """
+    Prompt for the next turn: the system prompt plus the running summary,
+    then as many of the latest unsummarized messages as fit in
+    ASSISTANT_HISTORY_TOKENS, then the new message.
+    """
+    system = system_prompt
+    if conversation.summary:
+        system = f"{system}\n\nSummary of the earlier conversation:\n{conversation.summary}"
+
+    budget = setting('ASSISTANT_HISTORY_TOKENS', 3000)
+    used = estimate_tokens(message)
+    history = []
+    recent = (
+        conversation.messages.filter(seq__gt=conversation.summarized_through)
+        .order_by('-seq')
+        .values_list('role', 'content', 'tokens')[:RECENT_WINDOW]
+    )
+    for role, content, tokens in recent:
+        if used + tokens > budget:
+            break
+        history.append({"role": role, "content": content})
+        used += tokens
+    history.reverse()
+
+    return [{"role": "system", "content": system}, *history, {"role": "user", "content": message}]
+
+
+def append_turn(conversation_id, message, reply):
+    """Store a question and its reply and flag the thread for compaction once its unsummarized part is too long."""
+    with db_transaction.atomic():
+        conversation = Conversation.objects.select_for_update().get(id=conversation_id)
+        seq = conversation.last_seq
+        ConversationMessage.objects.bulk_create([
+            ConversationMessage(conversation=conversation, seq=seq + 1, role='user', content=message, tokens=estimate_tokens(message)),
+            ConversationMessage(conversation=conversation, seq=seq + 2, role='assistant', content=reply, tokens=estimate_tokens(reply)),
+        ])
+        pending = (
+            conversation.messages.filter(seq__gt=conversation.summarized_through)
+            .aggregate(total=Sum('tokens'))['total'] or 0
+        )
+        conversation.last_seq = seq + 2
+        conversation.needs_summary = pending > setting('ASSISTANT_SUMMARY_TRIGGER_TOKENS', 2000)
+        conversation.save(update_fields=['last_seq', 'needs_summary', 'updated_at'])
+
+
+def compact(conversation, complete):
+    """
+    Fold the oldest unsummarized messages, all but the latest
+    ASSISTANT_KEEP_RECENT_MESSAGES, into the running summary using
+    ``complete(messages) -> str``. Returns True if the summary advanced.
+    """
+    start = conversation.summarized_through
+    through = min(conversation.last_seq - setting('ASSISTANT_KEEP_RECENT_MESSAGES', 6), start + MAX_COMPACT_MESSAGES)
+    if through <= start:
+        Conversation.objects.filter(id=conversation.id).update(needs_summary=False)
+        return False
+
+    transcript = "\n".join(
+        f"{role}: {content}"
+        for role, content in conversation.messages.filter(seq__gt=start, seq__lte=through)
+        .order_by('seq')
+        .values_list('role', 'content')
+    )
+    summary = complete([
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": f"Existing summary:\n{conversation.summary or '(none)'}\n\nNew messages:\n{transcript}"},
+    ])
+
+    # Only advance from the state the summary was built on; update() leaves
+    # updated_at alone so compaction doesn't reorder the thread list
+    remaining = conversation.last_seq - through
+    return bool(Conversation.objects.filter(id=conversation.id, summarized_through=start).update(
+        summary=summary,
+        summarized_through=through,
+        needs_summary=remaining > MAX_COMPACT_MESSAGES,
+    ))
+
+
+def compact_pending(complete, limit=50):
+    """Compact up to ``limit`` flagged threads. Returns (compacted, failed); failures stay flagged."""
+    compacted = failed = 0
+    for conversation in Conversation.objects.filter(needs_summary=True).order_by('updated_at')[:limit]:
+        try:
+            compacted += compact(conversation, complete)
+        except Exception:
+            failed += 1
+    return compacted, failed
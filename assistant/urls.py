@@ -4,4 +4,8 @@ from . import views
 urlpatterns = [
     path('', views.chat, name='chat'),
     path('csv/',  views.chat_with_csv, name='chat_with_csv'),
+    path('cache/metrics/', views.cache_metrics, name='assistant_cache_metrics'),
+    path('conversations/', views.conversation_list, name='assistant_conversations'),
+    path('conversations/<uuid:conversation_id>/', views.conversation_detail, name='assistant_conversation_detail'),
+    path('conversations/<uuid:conversation_id>/messages/', views.conversation_messages, name='assistant_conversation_messages'),
 ]
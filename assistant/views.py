@@ -1,84 +1,203 @@
-import os
-import csv
-import io
 import json
+import time
+import uuid
+from asgiref.sync import sync_to_async
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
-from openai import OpenAI
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from openai import APITimeoutError
 from dotenv import load_dotenv
 
+from users.authentication import UnifiedJWTAuthentication
+
+from . import llm
+from .cache import response_cache
+from .context import financial_context
+from .digest import digest_csv
+from .models import Conversation
+from .threads import append_turn, build_messages, get_thread
+
 load_dotenv()
 
+SYSTEM_PROMPT = (
+    "You are Emmanuel, a friendly and expert financial assistant "
+    "working for NeoFinance that helps users manage money wisely. "
+    "Keep answers clear, supportive, and smart."
+)
+
+
+async def authenticate(request):
+    """Return the bearer token's user, or None for anonymous requests."""
+    result = await sync_to_async(UnifiedJWTAuthentication().authenticate)(request)
+    return result[0] if result else None
+
+
+async def system_prompt_for(user):
+    if user is None:
+        return SYSTEM_PROMPT
+    context = await sync_to_async(financial_context)(user.id)
+    return f"{SYSTEM_PROMPT}\n\nThe user's current finances:\n{context}"
+
+
+async def reply_to(messages, cacheable=True, on_reply=None, extra=None):
+    extra = extra or {}
+    if cacheable:
+        cached, tier = await response_cache.lookup(messages)
+        if cached is not None:
+            if on_reply:
+                await on_reply(cached)
+            response = JsonResponse({"response": cached, **extra})
+            response["X-Assistant-Cache"] = tier
+            return response
+
+    try:
+        started = time.perf_counter()
+        reply = await llm.complete(messages)
+    except llm.AssistantBusy as e:
+        return JsonResponse({"error": str(e)}, status=503)
+    except APITimeoutError:
+        return JsonResponse({"error": "The assistant took too long to respond"}, status=504)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+    if cacheable:
+        await response_cache.store(messages, reply, time.perf_counter() - started)
+    if on_reply:
+        await on_reply(reply)
+    return JsonResponse({"response": reply, **extra})
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_events(messages, cacheable=True, on_reply=None, extra=None):
+    extra = extra or {}
+    # Sent before the upstream call so the client gets its first byte at once
+    yield ": connected\n\n"
+    if cacheable:
+        cached, tier = await response_cache.lookup(messages)
+        if cached is not None:
+            if on_reply:
+                await on_reply(cached)
+            yield sse("token", {"text": cached})
+            yield sse("done", {"cache": tier, **extra})
+            return
+
+    parts = []
+    try:
+        started = time.perf_counter()
+        async for text in llm.stream(messages):
+            parts.append(text)
+            yield sse("token", {"text": text})
+    except llm.AssistantBusy as e:
+        yield sse("error", {"error": str(e)})
+    except APITimeoutError:
+        yield sse("error", {"error": "The assistant took too long to respond"})
+    except Exception as e:
+        yield sse("error", {"error": str(e)})
+    else:
+        # Only complete replies are cached or saved; a disconnect never gets here
+        reply = "".join(parts)
+        if cacheable:
+            await response_cache.store(messages, reply, time.perf_counter() - started)
+        if on_reply:
+            await on_reply(reply)
+        yield sse("done", extra)
+
+
+def wants_stream(request):
+    return request.GET.get("stream", "").lower() in ("1", "true")
+
+
+async def respond(request, messages, cacheable=True, on_reply=None, extra=None):
+    """
+    Reply as JSON, or with ?stream=1 as Server-Sent Events: `token` events
+    carrying text as it is generated, then `done` or `error`. Chunks are
+    pulled from upstream only as fast as the client reads them. A complete
+    reply is passed to ``on_reply``; ``extra`` is merged into the JSON body
+    or the `done` event.
+    """
+    if not wants_stream(request):
+        return await reply_to(messages, cacheable, on_reply, extra)
+    response = StreamingHttpResponse(stream_events(messages, cacheable, on_reply, extra), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
 @csrf_exempt
-def chat(request):
+async def chat(request):
     """
-    POST /chat/ with JSON { message: "..." }
-    Returns assistant reply based on text only.
+    POST /chat/ with JSON { message: "...", conversation: null | "<uuid>" }
+    Returns assistant reply based on text only; add ?stream=1 for SSE.
+    With a bearer token the reply is grounded in the user's own finances.
+    Signed-in users can pass `conversation` (null starts a new one) to keep
+    a persisted thread; the reply then carries the conversation id.
     """
     if request.method != "POST":
         return JsonResponse({"error": "Invalid method"}, status=405)
 
     try:
         data = json.loads(request.body)
-        user_message = data.get("message", "")
-
-        client = OpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1"
-        )
-        completion = client.chat.completions.create(
-            model="deepseek/deepseek-r1:free",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are Emmanuel, a friendly and expert financial assistant "
-                        "working for NeoFinance that helps users manage money wisely. "
-                        "Keep answers clear, supportive, and smart."
-                    )
-                },
-                {"role": "user", "content": user_message}
-            ],
-            extra_headers={
-                "HTTP-Referer": "http://localhost:3000",
-                "X-Title": "NeoFinance Assistant"
-            }
-        )
-        return JsonResponse({"response": completion.choices[0].message.content})
-    except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"error": "Expected a JSON object"}, status=400)
+    user_message = data.get("message", "")
 
+    try:
+        user = await authenticate(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({"error": str(e.detail)}, status=401)
 
-def summarize_csv_file(uploaded_file, max_rows=20):
-    """
-    Read the uploaded CSV, parse into dicts, and produce
-    a short textual summary (first N rows).
-    """
-    decoded = uploaded_file.read().decode('utf-8')
-    reader = csv.DictReader(io.StringIO(decoded))
-    rows = list(reader)[:max_rows]
+    system_prompt = await system_prompt_for(user)
+    if "conversation" not in data:
+        return await respond(request, [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message},
+        ])
+
+    if user is None:
+        return JsonResponse({"error": "Sign in to keep conversations"}, status=401)
+    conversation_id = data["conversation"]
+    if conversation_id is not None:
+        try:
+            conversation_id = uuid.UUID(str(conversation_id))
+        except ValueError:
+            return JsonResponse({"error": "Invalid conversation id"}, status=400)
+    conversation = await sync_to_async(get_thread)(user.id, conversation_id, user_message)
+    if conversation is None:
+        return JsonResponse({"error": "Conversation not found"}, status=404)
+
+    messages = await sync_to_async(build_messages)(conversation, system_prompt, user_message)
+
+    async def save(reply):
+        await sync_to_async(append_turn)(conversation.id, user_message, reply)
+
+    return await respond(request, messages, on_reply=save, extra={"conversation": str(conversation.id)})
 
-    summary_lines = []
-    for row in rows:
-        date = row.get('Date', row.get('date', ''))
-        desc = row.get('Description', row.get('description', ''))
-        amt  = row.get('Amount', row.get('amount', ''))
-        typ  = row.get('Type', row.get('type', ''))
-        cat  = row.get('Category', row.get('category', ''))
-        summary_lines.append(f"{date} | {desc} | {amt} | {typ} | {cat}")
 
-    if len(rows) > max_rows:
-        summary_lines.append(f"...and {len(rows) - max_rows} more rows omitted.")
-    return "\n".join(summary_lines)
+def summarize_csv_file(uploaded_file):
+    """
+    Stream the uploaded CSV once and return a compact digest of the whole
+    file (totals per category and month, top merchants, outliers), so the
+    prompt size stays fixed however many rows it has.
+    """
+    return digest_csv(uploaded_file).render()
 
 
 @csrf_exempt
-def chat_with_csv(request):
+async def chat_with_csv(request):
     """
     POST /chat/csv/ multipart/form-data:
       - file: the CSV file
       - message: (optional) follow-up prompt
-    Returns assistant reply that incorporates the CSV content.
+    Returns assistant reply that incorporates the CSV content; add ?stream=1 for SSE.
     """
     if request.method != "POST":
         return JsonResponse({"error": "Invalid method"}, status=405)
@@ -90,37 +209,97 @@ def chat_with_csv(request):
     user_message = request.POST.get("message", "").strip()
 
     try:
-        csv_summary = summarize_csv_file(uploaded_file)
+        # Reading the whole upload is blocking work, kept off the event loop
+        csv_summary = await sync_to_async(summarize_csv_file)(uploaded_file)
     except Exception as e:
         return JsonResponse({"error": f"Failed to parse CSV: {str(e)}"}, status=400)
 
-    system_prompt = (
-        "You are Emmanuel, a friendly and expert financial assistant "
-        "working for NeoFinance that helps users manage money wisely. "
-        "Keep answers clear, supportive, and smart."
-    )
     combined_content = (
-        "Here is a summary of my recent transactions (first 20 rows):\n"
+        "Here is a digest of all the transactions in my file:\n"
         f"{csv_summary}\n\n"
         + (f"Additional question: {user_message}" if user_message else "")
     )
 
+    # CSV summaries are specific to one upload, so they skip the response cache
+    return await respond(request, [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user",   "content": combined_content},
+    ], cacheable=False)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_metrics(request):
+    """GET /assistant/cache/metrics/ → hit/miss counts and saved latency for this worker."""
+    return Response(response_cache.metrics())
+
+
+CONVERSATION_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def page_size(request):
     try:
-        client = OpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1"
-        )
-        completion = client.chat.completions.create(
-            model="deepseek/deepseek-r1:free",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user",   "content": combined_content},
-            ],
-            extra_headers={
-                "HTTP-Referer": "http://localhost:3000",
-                "X-Title": "NeoFinance Assistant"
-            }
-        )
-        return JsonResponse({"response": completion.choices[0].message.content})
-    except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
\ No newline at end of file
+        size = int(request.query_params.get('page_size', CONVERSATION_PAGE_SIZE))
+    except ValueError:
+        size = CONVERSATION_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def conversation_list(request):
+    """
+    GET /assistant/conversations/?before=<updated_at>&page_size=20
+    The user's conversations, most recently active first.
+    """
+    conversations = Conversation.objects.filter(user_id=request.user.id).order_by('-updated_at')
+    before = request.query_params.get('before')
+    if before:
+        before = parse_datetime(before)
+        if before is None:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        conversations = conversations.filter(updated_at__lt=before)
+    size = page_size(request)
+    rows = list(conversations.values('id', 'title', 'created_at', 'updated_at')[:size + 1])
+    next_cursor = rows[size - 1]['updated_at'] if len(rows) > size else None
+    return Response({'results': rows[:size], 'next_cursor': next_cursor})
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def conversation_detail(request, conversation_id):
+    """DELETE /assistant/conversations/<id>/ removes the conversation and its messages."""
+    deleted, _ = Conversation.objects.filter(id=conversation_id, user_id=request.user.id).delete()
+    if not deleted:
+        return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def conversation_messages(request, conversation_id):
+    """
+    GET /assistant/conversations/<id>/messages/?before=<seq>&page_size=20
+    The latest messages in chronological order; pass next_before to page back.
+    """
+    conversation = Conversation.objects.filter(id=conversation_id, user_id=request.user.id).first()
+    if conversation is None:
+        return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    messages = conversation.messages.order_by('-seq')
+    before = request.query_params.get('before')
+    if before:
+        try:
+            messages = messages.filter(seq__lt=int(before))
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    size = page_size(request)
+    rows = list(messages.values('seq', 'role', 'content', 'created_at')[:size + 1])
+    next_before = rows[size - 1]['seq'] if len(rows) > size else None
+    return Response({
+        'id': conversation.id,
+        'title': conversation.title,
+        'results': rows[:size][::-1],
+        'next_before': next_before,
+    })
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -106,17 +107,62 @@ DATABASES = {
     }
 }
 
+# Local memory per process by default (and in tests). Set REDIS_URL to share
+# cached finance responses and version counters between workers; this needs
+# the redis package installed. Without it the per-user finance caches and
+# ETags are turned off (see finance.cache.shared_cache).
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'users.authentication.GuestAwareJWTAuthentication',
-        'users.authentication.AdminAwareJWTAuthentication',
+        'users.authentication.UnifiedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ]
 }
 
+# Seconds an authenticated user row is cached per access token (0 disables)
+JWT_USER_CACHE_TTL = 30
+
+# Build request.user from token claims instead of loading it per request
+JWT_STATELESS_USER = os.getenv('JWT_STATELESS_USER', 'false').lower() == 'true'
+
+# Seconds between incremental reloads of the refresh token blacklist filter
+TOKEN_BLACKLIST_FILTER_TTL = 5
+TOKEN_BLACKLIST_FILTER_CAPACITY = 100000
+
+# Expired guests are deleted in batches, pausing between them, within a per-run time budget (seconds)
+GUEST_CLEANUP_BATCH_SIZE = 200
+GUEST_CLEANUP_TIME_BUDGET = 60
+GUEST_CLEANUP_PAUSE = 0.5
+# Most rows removed by one DELETE statement during guest cleanup
+GUEST_CLEANUP_ROW_CHUNK = 5000
+
+# Pre-created guest accounts kept ready for instant guest signup (0 disables the pool)
+GUEST_POOL_SIZE = int(os.getenv('GUEST_POOL_SIZE', '50'))
+
+# Rows per INSERT when bulk importing transactions from CSV
+FINANCE_IMPORT_BATCH_SIZE = 1000
+
+# Transactions store converted_amount in this currency
+BASE_CURRENCY = 'EUR'
+# Seconds a worker keeps its in-memory copy of the exchange rate table
+EXCHANGE_RATE_CACHE_TTL = 300
+
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=30),
@@ -168,4 +214,30 @@ STATIC_URL = 'static/'
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Assistant LLM upstream. Point ASSISTANT_LLM_BASE_URL at `manage.py run_llm_stub` to load-test offline.
+# Upstream calls share one connection pool per worker process.
+ASSISTANT_LLM_BASE_URL = os.getenv('ASSISTANT_LLM_BASE_URL', 'https://openrouter.ai/api/v1')
+ASSISTANT_LLM_API_KEY = os.getenv('OPENROUTER_API_KEY')
+ASSISTANT_LLM_MODEL = os.getenv('ASSISTANT_LLM_MODEL', 'deepseek/deepseek-r1:free')
+ASSISTANT_LLM_TIMEOUT = 60
+ASSISTANT_LLM_MAX_RETRIES = 2
+ASSISTANT_LLM_BACKOFF = 0.5
+ASSISTANT_LLM_MAX_CONNECTIONS = 20
+# Completions in flight per worker, and seconds a request waits for a slot before a 503
+ASSISTANT_LLM_CONCURRENCY = int(os.getenv('ASSISTANT_LLM_CONCURRENCY', '8'))
+ASSISTANT_LLM_QUEUE_TIMEOUT = 10
+
+# Assistant response cache: in-memory LRU entries per worker, DB tier TTL in seconds, and
+# the cosine similarity (0-1) at which a near-duplicate prompt is served (None disables)
+ASSISTANT_CACHE_ENABLED = True
+ASSISTANT_CACHE_SIZE = 1000
+ASSISTANT_CACHE_TTL = 86400
+ASSISTANT_CACHE_SIMILARITY = None
+
+# Assistant conversations: prompt tokens spent on recent history, unsummarized tokens that
+# trigger background compaction, and messages always kept verbatim after compaction
+ASSISTANT_HISTORY_TOKENS = 3000
+ASSISTANT_SUMMARY_TRIGGER_TOKENS = 2000
+ASSISTANT_KEEP_RECENT_MESSAGES = 6
@@ -29,6 +29,7 @@ from users.views      import AdminUserViewSet
 
 admin_list   = AdminUserViewSet.as_view({'get':    'list'})
 admin_delete = AdminUserViewSet.as_view({'delete': 'destroy'})
+admin_stats  = AdminUserViewSet.as_view({'get':    'stats'})
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -43,5 +44,6 @@ urlpatterns = [
     path('assistant/', include('assistant.urls')),
     path('admin-token/', AdminTokenObtainPairView.as_view(), name='admin-token'),
     path('admin/users/',       admin_list,   name='admin-user-list'),
+    path('admin/users/stats/',  admin_stats,  name='admin-user-stats'),
     path('admin/users/<uuid:pk>/', admin_delete, name='admin-user-delete'),
 ]
\ No newline at end of file
@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """A cache every process can see, so the per-user finance caches are on."""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / 'cache'),
+        }
+    }
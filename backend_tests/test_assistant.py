@@ -0,0 +1,185 @@
+import io
+import threading
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import Client
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from assistant import llm
+from assistant.cache import normalize, response_cache
+from assistant.context import financial_context
+from assistant.digest import MAX_CATEGORIES_TRACKED, OTHER_CATEGORIES, digest_csv
+from assistant.models import CachedResponse, Conversation
+from assistant.stub import make_server
+from assistant.threads import compact_pending
+from assistant.views import summarize_csv_file
+from users.models import CustomUser
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture
+def llm_stub(settings):
+    response_cache.clear()
+    server = make_server(port=0, reply="Save 20% of your income.")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.ASSISTANT_LLM_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    settings.ASSISTANT_LLM_API_KEY = "test"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_chat_replies_through_async_client(llm_stub):
+    response = Client().post("/assistant/", {"message": "How do I save?"}, content_type="application/json")
+    assert response.status_code == 200
+    assert response.json() == {"response": "Save 20% of your income."}
+
+def test_chat_rejects_json_that_is_not_an_object():
+    assert Client().post("/assistant/", ["hi"], content_type="application/json").status_code == 400
+
+def test_event_loops_share_one_client(llm_stub):
+    messages = [{"role": "user", "content": "hi"}]
+    assert async_to_sync(llm.complete)(messages) == "Save 20% of your income."
+    client = llm._runner._state.client
+    assert async_to_sync(llm.complete)(messages) == "Save 20% of your income."
+    assert llm._runner._state.client is client
+
+def test_chat_returns_503_when_no_slot_frees(llm_stub, settings):
+    settings.ASSISTANT_LLM_CONCURRENCY = 0
+    settings.ASSISTANT_LLM_QUEUE_TIMEOUT = 0.01
+    response = Client().post("/assistant/", {"message": "hi"}, content_type="application/json")
+    assert response.status_code == 503
+
+@pytest.mark.filterwarnings("ignore:StreamingHttpResponse must consume")
+def test_chat_streams_tokens_as_sse(llm_stub):
+    response = Client().post("/assistant/?stream=1", {"message": "How do I save?"}, content_type="application/json")
+    assert response["Content-Type"] == "text/event-stream"
+    body = b"".join(response).decode()
+    assert body.startswith(": connected")
+    tokens = [line for line in body.split("\n") if line.startswith("data:") and "text" in line]
+    assert len(tokens) == 5
+    assert body.rstrip().endswith("event: done\ndata: {}")
+
+def test_repeated_prompts_are_served_from_cache_tiers(llm_stub, settings):
+    client = Client()
+    ask = lambda message: client.post("/assistant/", {"message": message}, content_type="application/json")
+
+    assert "X-Assistant-Cache" not in ask("How do I save money?")
+    assert ask("how do i save   money").headers["X-Assistant-Cache"] == "memory"
+    assert CachedResponse.objects.count() == 1
+
+    response_cache.clear()
+    assert ask("How do I save money?").headers["X-Assistant-Cache"] == "db"
+
+    settings.ASSISTANT_CACHE_SIMILARITY = 0.7
+    similar = ask("How do I save money fast?")
+    assert similar.headers["X-Assistant-Cache"] == "similar"
+    assert similar.json() == {"response": "Save 20% of your income."}
+
+    metrics = response_cache.metrics()
+    assert metrics["hits"] == {"memory": 0, "db": 1, "similar": 1}
+
+def test_cache_keys_non_latin_prompts_by_their_words(llm_stub):
+    client = Client()
+    ask = lambda message: client.post("/assistant/", {"message": message}, content_type="application/json")
+
+    assert normalize("Как сэкономить деньги?") == "как сэкономить деньги"
+    assert "X-Assistant-Cache" not in ask("Как сэкономить деньги?")
+    assert "X-Assistant-Cache" not in ask("Что такое бюджет?")
+    assert ask("как сэкономить ДЕНЬГИ").headers["X-Assistant-Cache"] == "memory"
+
+    ask("?!")
+    assert "X-Assistant-Cache" not in ask("?!")
+
+def test_csv_digest_covers_whole_file_at_fixed_size():
+    lines = ["Date,Description,Amount,Type,Category"]
+    for i in range(2000):
+        lines.append(f"2025-{i % 12 + 1:02d}-10,Shop{i % 300},-{10 + i % 7},expense,Food")
+    lines.append("2025-06-15,Salary,3000,income,Salary")
+    lines.append("2025-06-20,New laptop,-2500,expense,Shopping")
+    lines.append("not-a-date,Broken,abc,expense,Food")
+
+    digest = summarize_csv_file(io.BytesIO("\n".join(lines).encode()))
+
+    assert "Transactions: 2002 (1 unreadable rows skipped)" in digest
+    assert "- Salary: 3000.00 / 0.00" in digest
+    assert "- 2500.00 New laptop on 2025-06-20" in digest
+    assert len(digest.splitlines()) < 40
+
+def test_chat_with_csv_sends_the_digest(llm_stub):
+    upload = io.BytesIO(b"Date,Description,Amount,Type,Category\n2025-01-10,Rent,-900,expense,Utilities\n")
+    upload.name = "bank.csv"
+    response = Client().post("/assistant/csv/", {"file": upload, "message": "Any advice?"})
+    assert response.status_code == 200
+    assert "- Utilities: 0.00 / 900.00" in llm_stub.received[-1]["messages"][1]["content"]
+
+def test_csv_digest_caps_tracked_categories():
+    lines = ["Date,Description,Amount,Type,Category"]
+    lines += [f"2025-01-10,Shop,-1,expense,Cat{i}" for i in range(500)]
+    digest = digest_csv(io.BytesIO("\n".join(lines).encode()))
+    assert len(digest.categories) <= MAX_CATEGORIES_TRACKED + 1
+    assert digest.categories[OTHER_CATEGORIES]["expense"] == 400
+
+def test_chat_grounds_authenticated_users_in_cached_context(llm_stub, shared_cache, django_assert_num_queries):
+    user = CustomUser.objects.create_user(email="ctx@example.com", username="ctx", password="pass123")
+    api = APIClient()
+    api.force_authenticate(user=user)
+    api.post("/finance/transactions/", {"amount": "1200.00", "type": "income", "category": "Salary", "recurrence": "monthly", "description": "Paycheck"}, format="json")
+
+    context = financial_context(user.id)
+    assert "Current balance: 1200.00" in context
+    assert "Salary income 1200.00" in context
+    assert "- Paycheck: 1200.00 income, monthly" in context
+    with django_assert_num_queries(0):
+        assert financial_context(user.id) == context
+
+    api.post("/finance/transactions/", {"amount": "-50.00", "type": "expense", "category": "Food"}, format="json")
+    assert "Current balance: 1150.00" in financial_context(user.id)
+
+    token = RefreshToken.for_user(user).access_token
+    response = Client().post("/assistant/", {"message": "Can I afford a trip?"}, content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert response.status_code == 200
+    assert "Current balance: 1150.00" in llm_stub.received[-1]["messages"][0]["content"]
+
+    bad = Client().post("/assistant/", {"message": "hi"}, content_type="application/json", HTTP_AUTHORIZATION="Bearer nope")
+    assert bad.status_code == 401
+
+def test_conversations_keep_bounded_summarized_history(llm_stub, settings):
+    settings.ASSISTANT_HISTORY_TOKENS = 60
+    settings.ASSISTANT_SUMMARY_TRIGGER_TOKENS = 40
+    settings.ASSISTANT_KEEP_RECENT_MESSAGES = 2
+    user = CustomUser.objects.create_user(email="thread@example.com", username="thread", password="pass123")
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+    client = Client()
+
+    assert client.post("/assistant/", {"message": "hi", "conversation": None}, content_type="application/json").status_code == 401
+    first = client.post("/assistant/", {"message": "I earn 3000 a month", "conversation": None}, content_type="application/json", **auth)
+    conversation_id = first.json()["conversation"]
+    for i in range(5):
+        client.post("/assistant/", {"message": f"Question {i} about my budget", "conversation": conversation_id}, content_type="application/json", **auth)
+
+    conversation = Conversation.objects.get(id=conversation_id)
+    assert conversation.last_seq == 12 and conversation.needs_summary
+    # Prompt history stays inside the token budget however long the thread is
+    assert len(llm_stub.received[-1]["messages"]) < 12
+
+    assert compact_pending(lambda messages: "User earns 3000 a month.") == (1, 0)
+    conversation.refresh_from_db()
+    assert conversation.summarized_through == 10 and not conversation.needs_summary
+
+    client.post("/assistant/", {"message": "And now?", "conversation": conversation_id}, content_type="application/json", **auth)
+    prompt = llm_stub.received[-1]["messages"]
+    assert "User earns 3000 a month." in prompt[0]["content"]
+    assert [m["content"] for m in prompt[1:]] == ["Question 4 about my budget", "Save 20% of your income.", "And now?"]
+
+    api = APIClient()
+    api.force_authenticate(user=user)
+    page = api.get(f"/assistant/conversations/{conversation_id}/messages/?page_size=4").json()
+    assert [m["seq"] for m in page["results"]] == [11, 12, 13, 14]
+    older = api.get(f"/assistant/conversations/{conversation_id}/messages/?page_size=4&before={page['next_before']}").json()
+    assert [m["seq"] for m in older["results"]] == [7, 8, 9, 10]
+    assert api.get("/assistant/conversations/").json()["results"][0]["title"] == "I earn 3000 a month"
+
+    other = CustomUser.objects.create_user(email="other@example.com", username="other", password="pass123")
+    api.force_authenticate(user=other)
+    assert api.get(f"/assistant/conversations/{conversation_id}/messages/").status_code == 404
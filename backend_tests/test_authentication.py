@@ -0,0 +1,173 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from finance.models import Budget, Category, Transaction
+from users.blacklist import BlacklistFilter, blacklist_filter, purge_expired_tokens
+from users.cleanup import delete_expired_guests
+from users.guest_pool import pooled_guests, refill_pool
+from users.models import ClaimsUser, CustomUser
+
+@pytest.mark.django_db
+def test_unified_auth_caches_user_per_token(shared_cache, django_assert_num_queries):
+    user = CustomUser.objects.create_user(email="auth1@example.com", username="auth1", password="pass123")
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    assert client.get("/finance/budgets/status/").status_code == 200
+    with django_assert_num_queries(0):
+        assert client.get("/finance/budgets/status/").status_code == 200
+
+@pytest.mark.django_db
+def test_unified_auth_rejects_expired_guest_token():
+    user = CustomUser.objects.create_user(email="auth2@example.com", username="auth2", password="pass123")
+    token = AccessToken.for_user(user)
+    token["is_guest"] = True
+    token["iat"] = int((token.current_time - timedelta(days=4)).timestamp())
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert client.get("/users/me/").status_code == 401
+
+@pytest.mark.django_db
+def test_unified_auth_rejects_admin_claim_for_non_staff():
+    user = CustomUser.objects.create_user(email="auth3@example.com", username="auth3", password="pass123")
+    token = AccessToken.for_user(user)
+    token["is_admin"] = True
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert client.get("/users/me/").status_code == 401
+
+@pytest.mark.django_db
+def test_stateless_mode_builds_user_from_claims(settings, django_assert_num_queries):
+    settings.JWT_STATELESS_USER = True
+    CustomUser.objects.create_user(email="auth4@example.com", username="auth4", password="pass123")
+    client = APIClient()
+    login = client.post("/users/login/", {"email": "auth4@example.com", "password": "pass123"}, format="json")
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+
+    # Only the budget query itself, no user load
+    with django_assert_num_queries(1):
+        assert client.get("/finance/budgets/status/").status_code == 200
+
+@pytest.mark.django_db
+def test_claims_user_loads_remaining_fields_in_one_query(django_assert_num_queries):
+    user = CustomUser.objects.create_user(email="auth5@example.com", username="auth5", password="pass123")
+    claims_user = ClaimsUser.from_claims(user.id, False, False)
+    with django_assert_num_queries(1):
+        assert claims_user.email == "auth5@example.com"
+        assert claims_user.username == "auth5"
+
+@pytest.mark.django_db
+def test_refresh_rotates_and_rejects_replayed_token():
+    blacklist_filter.invalidate()
+    CustomUser.objects.create_user(email="auth6@example.com", username="auth6", password="pass123")
+    client = APIClient()
+    login = client.post("/users/login/", {"email": "auth6@example.com", "password": "pass123"}, format="json")
+
+    rotated = client.post("/users/refresh-token/", {"refresh": login.data["refresh"]}, format="json")
+    assert rotated.status_code == 200
+    assert rotated.data["refresh"] != login.data["refresh"]
+
+    replayed = client.post("/users/refresh-token/", {"refresh": login.data["refresh"]}, format="json")
+    assert replayed.status_code == 401
+    assert client.post("/users/refresh-token/", {"refresh": rotated.data["refresh"]}, format="json").status_code == 200
+
+@pytest.mark.django_db
+def test_blacklist_filter_skips_db_for_unknown_jti(django_assert_num_queries):
+    blacklist_filter.invalidate()
+    blacklist_filter.might_contain("warm-up")
+    with django_assert_num_queries(0):
+        assert not blacklist_filter.might_contain("never-blacklisted")
+
+@pytest.mark.django_db
+def test_blacklist_filter_sizes_itself_from_the_live_rows(django_assert_num_queries):
+    now = timezone.now()
+    for i in range(5):
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.create(jti=f"bl-{i}", token="x", expires_at=now + timedelta(days=1)))
+    bloom_filter = BlacklistFilter(ttl=3600, capacity=3)
+
+    # One full load, not a rebuild per lookup once the rows outgrow the capacity
+    with django_assert_num_queries(1):
+        for i in range(4):
+            assert bloom_filter.might_contain(f"bl-{i}")
+
+    # Incremental reloads re-read the overlap window without counting it twice
+    bloom_filter._ttl = 0
+    bloom_filter.might_contain("bl-0")
+    assert (bloom_filter._bloom.capacity, bloom_filter._bloom.count) == (10, 5)
+
+@pytest.mark.django_db
+def test_purge_expired_tokens_deletes_in_chunks():
+    now = timezone.now()
+    for i in range(5):
+        token = OutstandingToken.objects.create(jti=f"old-{i}", token="x", expires_at=now - timedelta(days=1))
+        BlacklistedToken.objects.create(token=token)
+    OutstandingToken.objects.create(jti="live", token="x", expires_at=now + timedelta(days=1))
+
+    assert purge_expired_tokens(chunk_size=2, now=now) == (5, 5)
+    assert list(OutstandingToken.objects.values_list("jti", flat=True)) == ["live"]
+
+@pytest.mark.django_db
+def test_delete_expired_guests_removes_dependents_in_batches(settings):
+    settings.GUEST_POOL_SIZE = 0
+    now = timezone.now()
+    keep = CustomUser.objects.create_user(email="keep@example.com", username="keep")
+    Category.objects.create(user=keep, name="Food")
+    for i in range(3):
+        guest = CustomUser.objects.create_user(email=f"guest{i}@neo.finance", username=f"guest{i}")
+        CustomUser.objects.filter(id=guest.id).update(is_guest=True, created_at=now - timedelta(days=4))
+        category = Category.objects.create(user=guest, name="Food")
+        Budget.objects.create(user=guest, category=category, amount=Decimal("10"), start_date=now.date(), end_date=now.date())
+        Transaction.objects.create(user=guest, amount=Decimal("-5"), type="expense", category="Food")
+
+    settings.GUEST_CLEANUP_ROW_CHUNK = 1
+    with CaptureQueriesContext(connection) as queries:
+        deleted, recycled, removed, finished = delete_expired_guests(now=now, batch_size=2, pause=0)
+
+    assert (deleted, recycled, finished) == (3, 0, True)
+    assert removed["finance.Transaction"] == 3
+    # Rows go through DELETE ... IN (subquery) one chunk at a time, never a SELECT of ids
+    transaction_queries = [q["sql"] for q in queries.captured_queries if q["sql"].startswith('DELETE FROM "finance_transaction"')]
+    assert len(transaction_queries) == 5
+    assert all("IN (SELECT" in sql and "LIMIT 1" in sql for sql in transaction_queries)
+    assert removed["finance.Budget"] == 3
+    assert list(CustomUser.objects.values_list("email", flat=True)) == ["keep@example.com"]
+    assert Category.objects.count() == 1
+
+@pytest.mark.django_db
+def test_guest_signup_claims_from_pool(settings, monkeypatch):
+    settings.GUEST_POOL_SIZE = 2
+    assert refill_pool() == 2
+    assert refill_pool() == 0
+
+    # Rows skipped as conflicts are not reported as added
+    monkeypatch.setattr("users.guest_pool.random_suffix", lambda n=6: "same")
+    assert refill_pool(target=4) == 1
+
+    response = APIClient().post("/users/guest-signup/")
+    assert response.status_code == 200
+    claimed = CustomUser.objects.get(id=response.data["user"]["id"])
+    assert claimed.is_guest and not claimed.in_guest_pool
+    assert pooled_guests().count() == 2
+
+@pytest.mark.django_db
+def test_expired_guests_are_recycled_into_pool(settings):
+    settings.GUEST_POOL_SIZE = 1
+    now = timezone.now()
+    for i in range(2):
+        guest = CustomUser.objects.create_user(email=f"old{i}@neo.finance", username=f"old{i}")
+        CustomUser.objects.filter(id=guest.id).update(is_guest=True, created_at=now - timedelta(days=4), is_active=False, last_login=now)
+        Category.objects.create(user=guest, name="Food")
+
+    deleted, recycled, removed, finished = delete_expired_guests(now=now, pause=0)
+
+    assert (deleted, recycled) == (1, 1)
+    assert Category.objects.count() == 0
+    pooled = CustomUser.objects.get()
+    assert pooled.in_guest_pool and pooled.id != guest.id
+    assert pooled.is_active and pooled.last_login is None
@@ -0,0 +1,99 @@
+import io
+import pytest
+from django.core.management import call_command
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from finance.currency import convert, convert_as_of, rate_table
+from finance.models import ExchangeRate, Transaction
+from users.models import CustomUser
+
+@pytest.fixture
+def rates(db):
+    ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.1000"))
+    ExchangeRate.objects.create(base_currency="EUR", target_currency="RON", rate=Decimal("5.0000"))
+    rate_table.invalidate()
+    yield
+    rate_table.invalidate()
+
+def test_convert_direct_inverse_and_cross_rates(rates, django_assert_num_queries):
+    assert convert(Decimal("10"), "EUR", "USD") == Decimal("11.00")
+    with django_assert_num_queries(0):
+        assert convert(Decimal("11"), "USD") == Decimal("10.00")
+        assert convert(Decimal("11"), "USD", "RON") == Decimal("50.00")
+        assert convert(Decimal("5"), "GBP") is None
+
+def test_rate_table_reloads_when_rates_change(rates):
+    assert convert(Decimal("10"), "EUR", "USD") == Decimal("11.00")
+    ExchangeRate.objects.filter(target_currency="USD").first().delete()
+    ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.2000"))
+    assert convert(Decimal("10"), "EUR", "USD") == Decimal("12.00")
+
+def test_converted_amount_filled_on_write(rates):
+    user = CustomUser.objects.create_user(username='john_fx1', email='john_fx1@yahoo.com', password='pass123')
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.post("/finance/transactions/", {"amount": "-22.00", "currency": "USD", "type": "expense", "category": "Food"})
+    assert response.status_code == 201
+    assert response.data["converted_amount"] == "-20.00"
+
+    client.patch(f"/finance/transactions/{response.data['id']}/update/", {"currency": "RON"}, format="json")
+    assert Transaction.objects.get(id=response.data["id"]).converted_amount == Decimal("-4.40")
+
+def test_backfill_converted_amounts(rates):
+    user = CustomUser.objects.create_user(username='john_fx2', email='john_fx2@yahoo.com', password='pass123')
+    txn = Transaction.objects.create(user=user, category="Food", amount=Decimal("-55"), currency="USD", type="expense")
+    call_command("backfill_converted_amounts", "--chunk-size", "1", stdout=io.StringIO())
+    txn.refresh_from_db()
+    assert txn.converted_amount == Decimal("-50.00")
+
+@pytest.mark.django_db
+def test_load_rates_and_convert_as_of(tmp_path, django_assert_num_queries):
+    path = tmp_path / "rates.csv"
+    path.write_text(
+        "date,base_currency,target_currency,rate\n"
+        "2025-01-01,EUR,USD,1.0000\n"
+        "2025-02-01,EUR,USD,1.2500\n"
+        "2025-02-01,EUR,RON,bad\n"
+    )
+    out = io.StringIO()
+    call_command("load_exchange_rates", str(path), stdout=out)
+    assert "Loaded 2 rates" in out.getvalue()
+    assert ExchangeRate.objects.get(target_currency="USD").rate == Decimal("1.2500")
+
+    user = CustomUser.objects.create_user(username='john_fx3', email='john_fx3@yahoo.com', password='pass123')
+    january = Transaction.objects.create(user=user, category="Food", amount=Decimal("-10"), currency="USD", date=datetime(2025, 1, 15, tzinfo=timezone.utc))
+    march = Transaction.objects.create(user=user, category="Food", amount=Decimal("-10"), currency="USD", date=datetime(2025, 3, 1, tzinfo=timezone.utc))
+    early = Transaction.objects.create(user=user, category="Food", amount=Decimal("-10"), currency="USD", date=datetime(2024, 6, 1, tzinfo=timezone.utc))
+
+    with django_assert_num_queries(1):
+        converted = convert_as_of(Transaction.objects.filter(user=user))
+    # Before the first history point the earliest known rate applies
+    assert converted == {january.id: Decimal("-10.00"), march.id: Decimal("-8.00"), early.id: Decimal("-10.00")}
+
+    out = io.StringIO()
+    call_command("load_exchange_rates", str(path), stdout=out)
+    assert "Loaded 0 rates" in out.getvalue()
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    backdated = client.post("/finance/transactions/", {"amount": "-10.00", "currency": "USD", "type": "expense", "category": "Food", "date": "2025-01-20T12:00:00Z"})
+    assert backdated.data["converted_amount"] == "-10.00"
+    client.patch(f"/finance/transactions/{backdated.data['id']}/update/", {"date": "2025-02-20T12:00:00Z"}, format="json")
+    assert Transaction.objects.get(id=backdated.data["id"]).converted_amount == Decimal("-8.00")
+    before_history = client.post("/finance/transactions/", {"amount": "-10.00", "currency": "USD", "type": "expense", "category": "Food", "date": "2024-06-01T12:00:00Z"})
+    assert before_history.data["converted_amount"] == "-10.00"
+    # Base-currency rows need no rate lookup at all
+    with django_assert_num_queries(0):
+        assert convert(Decimal("5"), "EUR", as_of=datetime(2024, 1, 1, tzinfo=timezone.utc)) == Decimal("5.00")
+
+    upload = SimpleUploadedFile("rates.csv", (
+        "Date,Description,Amount,Type,Category,Currency\n"
+        "15/01/2025,Lunch,-10,expense,Food,USD\n"
+        "01/03/2025,Dinner,-10,expense,Food,USD\n"
+    ).encode(), content_type="text/csv")
+    assert client.post("/finance/transactions/import/", {"file": upload}, format="multipart").data["created"] == 2
+    imported = Transaction.objects.filter(user=user, description__in=["Lunch", "Dinner"]).order_by("date")
+    assert [txn.converted_amount for txn in imported] == [Decimal("-10.00"), Decimal("-8.00")]
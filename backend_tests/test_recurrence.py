@@ -0,0 +1,46 @@
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from finance.models import Transaction, MonthlyRollup
+from finance.recurrence import materialize_due_occurrences
+from users.models import CustomUser
+
+@pytest.mark.django_db
+def test_materializes_daily_occurrences_once():
+    user = CustomUser.objects.create_user(username='john_recur1', email='john_recur1@yahoo.com', password='pass123')
+    source = Transaction.objects.create(user=user, category="Transport", amount=-3, type="expense", recurrence="daily", date=datetime(2025, 1, 1, 8, 0, tzinfo=timezone.utc))
+    now = datetime(2025, 1, 4, 9, 0, tzinfo=timezone.utc)
+
+    assert materialize_due_occurrences(now=now) == 3
+    occurrences = Transaction.objects.filter(recurrence_source=source).order_by('date')
+    assert [o.occurrence_date.day for o in occurrences] == [2, 3, 4]
+    assert all(o.recurrence == "none" for o in occurrences)
+    assert MonthlyRollup.objects.get(user=user, category="Transport").total == Decimal("-9.00")
+
+    assert materialize_due_occurrences(now=now) == 0
+
+    # Losing the high-water mark must not duplicate occurrences
+    Transaction.objects.filter(id=source.id).update(materialized_through=None)
+    assert materialize_due_occurrences(now=now) == 0
+    assert Transaction.objects.filter(recurrence_source=source).count() == 3
+
+@pytest.mark.django_db
+def test_monthly_occurrences_clamp_to_month_end():
+    user = CustomUser.objects.create_user(username='john_recur2', email='john_recur2@yahoo.com', password='pass123')
+    source = Transaction.objects.create(user=user, category="Utilities", amount=-50, type="expense", recurrence="monthly", date=datetime(2025, 1, 31, tzinfo=timezone.utc))
+
+    assert materialize_due_occurrences(now=datetime(2025, 2, 28, tzinfo=timezone.utc)) == 1
+    assert materialize_due_occurrences(now=datetime(2025, 4, 1, tzinfo=timezone.utc)) == 1
+    dates = list(Transaction.objects.filter(recurrence_source=source).order_by('date').values_list('occurrence_date', flat=True))
+    assert [d.isoformat() for d in dates] == ["2025-02-28", "2025-03-31"]
+
+@pytest.mark.django_db
+def test_moving_source_past_high_water_mark_does_not_copy_it():
+    user = CustomUser.objects.create_user(username='john_recur3', email='john_recur3@yahoo.com', password='pass123')
+    source = Transaction.objects.create(user=user, category="Transport", amount=-3, type="expense", recurrence="daily", date=datetime(2025, 1, 1, 8, 0, tzinfo=timezone.utc))
+    assert materialize_due_occurrences(now=datetime(2025, 1, 4, 9, 0, tzinfo=timezone.utc)) == 3
+
+    Transaction.objects.filter(id=source.id).update(date=datetime(2025, 1, 10, 8, 0, tzinfo=timezone.utc))
+    assert materialize_due_occurrences(now=datetime(2025, 1, 12, 9, 0, tzinfo=timezone.utc)) == 2
+    dates = Transaction.objects.filter(recurrence_source=source).order_by('date').values_list('occurrence_date', flat=True)
+    assert [d.day for d in dates] == [2, 3, 4, 11, 12]
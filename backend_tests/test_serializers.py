@@ -1,5 +1,10 @@
+import json
 import pytest
-from finance.serializers import TransactionSerializer
+from decimal import Decimal
+from datetime import timezone as dt_timezone
+from rest_framework.utils.encoders import JSONEncoder
+from finance.models import Transaction
+from finance.serializers import TransactionSerializer, serialize_transactions
 from users.models import CustomUser
 from rest_framework.test import APIRequestFactory
 from datetime import datetime
@@ -53,4 +58,16 @@ def test_user_serializer_creates_user():
     assert serializer.is_valid(), serializer.errors
     user = serializer.save()
     assert CustomUser.objects.filter(email="serialize@example.com").exists()
-    assert user.username == "serialuser"
\ No newline at end of file
+    assert user.username == "serialuser"
+
+@pytest.mark.django_db
+def test_fast_path_matches_transaction_serializer():
+    user = CustomUser.objects.create_user(username='john_serial3', email='john_serial3@yahoo.com', password='testpass')
+    Transaction.objects.create(user=user, category="Food", amount=Decimal("-12.5"), type="expense", description="Lunch")
+    Transaction.objects.create(user=user, category="Salary", amount=Decimal("1500"), currency="USD", converted_amount=Decimal("1380.25"), type="income", recurrence="monthly", date=datetime(2025, 1, 31, 9, 30, 15, 123456, tzinfo=dt_timezone.utc))
+    Transaction.objects.create(user=user, category="Gifts", amount=Decimal("0"), type="income", description=None)
+
+    queryset = Transaction.objects.filter(user=user).order_by('-date')
+    fast = serialize_transactions(queryset)
+    drf = json.loads(json.dumps(TransactionSerializer(queryset, many=True).data, cls=JSONEncoder))
+    assert fast == drf
@@ -1,8 +1,20 @@
+import io
+import json
 import pytest
+from importlib import import_module
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from decimal import Decimal
 from rest_framework.test import APIClient
 from users.models import CustomUser
-from finance.models import Transaction
-from datetime import datetime
+from finance.models import Transaction, MonthlyRollup, Category, Budget
+from django.core.management import call_command
+from finance.ledger import reconcile_balances
+from users.guest_pool import refill_pool
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.core.files.uploadedfile import SimpleUploadedFile
+from datetime import datetime, timedelta, timezone
 
 @pytest.mark.django_db
 def test_create_transaction():
@@ -63,3 +75,314 @@ def test_guest_signup_view():
     assert "access" in response.data
     assert "refresh" in response.data
     assert CustomUser.objects.get(id=response.data["user"]["id"]).is_guest
+
+@pytest.mark.django_db
+def test_transactions_keyset_pagination():
+    user = CustomUser.objects.create_user(username='john_page1', email='john_page1@yahoo.com', password='pass123')
+    for i in range(5):
+        Transaction.objects.create(user=user, category="Food", amount=10 + i, date=datetime(2025, 1, 1 + i, tzinfo=timezone.utc))
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    first = client.get("/finance/transactions/", {"page_size": 2})
+    assert first.status_code == 200
+    assert [t["amount"] for t in first.data["results"]] == ["14.00", "13.00"]
+
+    second = client.get("/finance/transactions/", {"page_size": 2, "cursor": first.data["next"]})
+    third = client.get("/finance/transactions/", {"page_size": 2, "cursor": second.data["next"]})
+    assert [t["amount"] for t in second.data["results"]] == ["12.00", "11.00"]
+    assert [t["amount"] for t in third.data["results"]] == ["10.00"]
+    assert third.data["next"] is None
+
+@pytest.mark.django_db
+def test_transactions_cursor_is_an_index_range_scan():
+    user = CustomUser.objects.create_user(username='john_page2', email='john_page2@yahoo.com', password='pass123')
+    for i in range(5):
+        Transaction.objects.create(user=user, category="Food", amount=10 + i, date=datetime(2025, 1, 1 + i, tzinfo=timezone.utc))
+    client = APIClient()
+    client.force_authenticate(user=user)
+    first = client.get("/finance/transactions/", {"page_size": 2})
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/finance/transactions/", {"page_size": 2, "cursor": first.data["next"]})
+    page_query = next(q["sql"] for q in queries.captured_queries if "ORDER BY" in q["sql"])
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN {page_query}")
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+    index_cond = next(line for line in plan.splitlines() if "Index Cond" in line)
+    assert "date <=" in index_cond
+
+@pytest.mark.django_db
+def test_transactions_filters():
+    user = CustomUser.objects.create_user(username='john_filter1', email='john_filter1@yahoo.com', password='pass123')
+    Transaction.objects.create(user=user, category="Food", amount=-30, type="expense", description="Weekly groceries", date=datetime(2025, 3, 2, tzinfo=timezone.utc))
+    Transaction.objects.create(user=user, category="Salary", amount=2000, type="income", description="March salary", date=datetime(2025, 3, 5, tzinfo=timezone.utc))
+    Transaction.objects.create(user=user, category="Food", amount=-80, type="expense", description="Restaurant", date=datetime(2025, 4, 1, tzinfo=timezone.utc))
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get("/finance/transactions/", {"type": "expense", "date_to": "2025-03-31"})
+    assert [t["description"] for t in response.data] == ["Weekly groceries"]
+
+    response = client.get("/finance/transactions/", {"search": "salary", "min_amount": "100"})
+    assert [t["category"] for t in response.data] == ["Salary"]
+
+    response = client.get("/finance/transactions/", {"date_from": "not-a-date"})
+    assert response.status_code == 400
+
+@pytest.mark.django_db
+def test_transactions_summary():
+    user = CustomUser.objects.create_user(username='john_summary1', email='john_summary1@yahoo.com', password='pass123')
+    now = datetime.now(timezone.utc)
+    Transaction.objects.create(user=user, category="Food", amount=-30, type="expense", date=now)
+    Transaction.objects.create(user=user, category="Food", amount=-20, type="expense", date=now)
+    Transaction.objects.create(user=user, category="Salary", amount=1000, type="income", date=now)
+    call_command("rebuild_rollups")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get("/finance/summary/", {"period": "monthly", "buckets": 3})
+    assert response.status_code == 200
+    assert len(response.data["trend"]) == 3
+    assert response.data["trend"][-1] == {"bucket": now.date().replace(day=1).isoformat(), "income": "1000.00", "expense": "-50.00", "count": 3}
+    assert {"category": "Food", "type": "expense", "total": "-50.00", "count": 2} in response.data["categories"]
+    assert response.data["totals"]["month"] == {"income": "1000.00", "expense": "-50.00"}
+
+    response = client.get("/finance/summary/", {"period": "daily"})
+    assert response.status_code == 400
+
+@pytest.mark.django_db
+def test_rollups_follow_transaction_writes():
+    user = CustomUser.objects.create_user(username='john_rollup1', email='john_rollup1@yahoo.com', password='pass123')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    date = datetime(2025, 2, 10, tzinfo=timezone.utc).isoformat()
+
+    first = client.post("/finance/transactions/", {"amount": "-30.00", "type": "expense", "category": "Food", "date": date})
+    client.post("/finance/transactions/", {"amount": "-20.00", "type": "expense", "category": "Food", "date": date})
+    rollup = MonthlyRollup.objects.get(user=user, category="Food")
+    assert (rollup.month.isoformat(), rollup.total, rollup.count) == ("2025-02-01", Decimal("-50.00"), 2)
+
+    client.patch(f"/finance/transactions/{first.data['id']}/update/", {"category": "Transport"}, format="json")
+    assert MonthlyRollup.objects.get(user=user, category="Food").total == Decimal("-20.00")
+    assert MonthlyRollup.objects.get(user=user, category="Transport").total == Decimal("-30.00")
+
+    client.delete(f"/finance/transactions/{first.data['id']}/")
+    assert not MonthlyRollup.objects.filter(user=user, category="Transport").exists()
+
+@pytest.mark.django_db
+def test_rebuild_rollups_check_reports_drift():
+    user = CustomUser.objects.create_user(username='john_rollup2', email='john_rollup2@yahoo.com', password='pass123')
+    Transaction.objects.create(user=user, category="Food", amount=-15, type="expense")
+    out = io.StringIO()
+
+    call_command("rebuild_rollups", "--check", stdout=out)
+    assert "1 rollup rows drifted" in out.getvalue()
+
+    call_command("rebuild_rollups", stdout=io.StringIO())
+    out = io.StringIO()
+    call_command("rebuild_rollups", "--check", stdout=out)
+    assert "0 rollup rows drifted" in out.getvalue()
+
+@pytest.mark.django_db
+def test_rollup_backfill_covers_transactions_written_before_rollups():
+    user = CustomUser.objects.create_user(username='john_rollup3', email='john_rollup3@yahoo.com', password='pass123')
+    old = Transaction.objects.create(user=user, category="Food", amount=-15, type="expense")
+    Transaction.objects.create(user=user, category="Food", amount=-5, type="expense")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    client.delete(f"/finance/transactions/{old.id}/")
+    assert not MonthlyRollup.objects.filter(user=user).exists()
+
+    import_module("finance.migrations.0007_monthlyrollup").backfill_rollups(apps, None)
+    rollup = MonthlyRollup.objects.get(user=user)
+    assert (rollup.total, rollup.count) == (Decimal("-5.00"), 1)
+
+@pytest.mark.django_db
+def test_import_transactions_csv():
+    user = CustomUser.objects.create_user(username='john_import1', email='john_import1@yahoo.com', password='pass123')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    content = (
+        "Date,Description,Amount,Type,Category\n"
+        "2025-03-01,Groceries,-42.50,Expense,Food\n"
+        "05 March 2025,Salary,2500.00,income,Salary\n"
+        "2025-03-07,Broken,abc,expense,Food\n"
+        "2025-03-09,Bus,-2.00,expense,Transport\n"
+    )
+    upload = SimpleUploadedFile("history.csv", content.encode(), content_type="text/csv")
+
+    response = client.post("/finance/transactions/import/?batch_size=2", {"file": upload}, format="multipart")
+    assert response.status_code == 200
+    assert response.data["created"] == 3
+    assert response.data["failed"] == 1
+    assert response.data["errors"][0]["row"] == 4
+    assert "amount" in response.data["errors"][0]["errors"]
+    assert Transaction.objects.filter(user=user).count() == 3
+    assert MonthlyRollup.objects.get(user=user, category="Food").total == Decimal("-42.50")
+
+@pytest.mark.django_db
+def test_export_transactions_streams_csv_and_ndjson():
+    user = CustomUser.objects.create_user(username='john_export1', email='john_export1@yahoo.com', password='pass123')
+    Transaction.objects.create(user=user, category="Food", amount=-12, type="expense", description="Lunch", date=datetime(2025, 5, 1, tzinfo=timezone.utc))
+    Transaction.objects.create(user=user, category="Salary", amount=900, type="income", description="Pay", date=datetime(2025, 5, 2, tzinfo=timezone.utc))
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get("/finance/transactions/export/", {"type": "expense"})
+    assert response.status_code == 200
+    assert response.streaming
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0] == "Transaction ID,Date,Description,Amount,Type,Category,Recurrence"
+    assert lines[1].endswith(",2025-05-01T00:00:00Z,Lunch,-12.00,expense,Food,none")
+    assert len(lines) == 2
+
+    response = client.get("/finance/transactions/export/", {"output": "ndjson"})
+    rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+    assert [row["description"] for row in rows] == ["Pay", "Lunch"]
+
+@pytest.mark.django_db
+def test_batch_transactions():
+    user = CustomUser.objects.create_user(username='john_batch1', email='john_batch1@yahoo.com', password='pass123')
+    other = CustomUser.objects.create_user(username='john_batch2', email='john_batch2@yahoo.com', password='pass123')
+    to_update = Transaction.objects.create(user=user, category="Food", amount=-10, type="expense")
+    to_delete = Transaction.objects.create(user=user, category="Transport", amount=-5, type="expense")
+    foreign = Transaction.objects.create(user=other, category="Food", amount=-99, type="expense")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.post("/finance/transactions/batch/", {"operations": [
+        {"op": "create", "data": {"amount": "-7.00", "type": "expense", "category": "Shopping"}},
+        {"op": "create", "data": {"amount": "-7.00", "category": "Nope"}},
+        {"op": "update", "id": str(to_update.id), "data": {"amount": "-15.00"}},
+        {"op": "delete", "id": str(to_delete.id)},
+        {"op": "delete", "id": str(foreign.id)},
+    ]}, format="json")
+
+    assert response.status_code == 200
+    assert [r["status"] for r in response.data["results"]] == [201, 400, 200, 204, 404]
+    assert response.data["results"][2]["data"]["amount"] == "-15.00"
+    assert Transaction.objects.filter(user=user, category="Shopping").exists()
+    assert not Transaction.objects.filter(id=to_delete.id).exists()
+    assert Transaction.objects.filter(id=foreign.id).exists()
+
+@pytest.mark.django_db
+def test_budget_status_is_cached_until_a_write(shared_cache, django_assert_num_queries):
+    user = CustomUser.objects.create_user(username='john_budget1', email='john_budget1@yahoo.com', password='pass123')
+    today = datetime.now(timezone.utc).date()
+    food = Category.objects.create(user=user, name="Food", type="expense")
+    Budget.objects.create(user=user, category=food, amount=Decimal("100.00"), start_date=today.replace(day=1), end_date=today + timedelta(days=30))
+    Budget.objects.create(user=user, category=food, amount=Decimal("50.00"), start_date=today - timedelta(days=90), end_date=today - timedelta(days=60))
+    Transaction.objects.create(user=user, category="Food", amount=-40, type="expense")
+    Transaction.objects.create(user=user, category="Transport", amount=-25, type="expense")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get("/finance/budgets/status/")
+    assert len(response.data) == 1
+    assert response.data[0]["spent"] == "40.00"
+    assert response.data[0]["remaining"] == "60.00"
+    assert response.data[0]["percent_used"] == 40.0
+
+    with django_assert_num_queries(0):
+        client.get("/finance/budgets/status/")
+
+    client.post("/finance/transactions/", {"amount": "-70.00", "type": "expense", "category": "Food"})
+    response = client.get("/finance/budgets/status/")
+    assert response.data[0]["spent"] == "110.00"
+    assert response.data[0]["over_budget"] is True
+
+@pytest.mark.django_db
+def test_balance_follows_transaction_writes():
+    user = CustomUser.objects.create_user(username='john_balance1', email='john_balance1@yahoo.com', password='pass123')
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    client.post("/finance/transactions/", {"amount": "1000.00", "type": "income", "category": "Salary"})
+    expense = client.post("/finance/transactions/", {"amount": "-30.00", "type": "expense", "category": "Food"})
+    client.patch(f"/finance/transactions/{expense.data['id']}/update/", {"amount": "-45.00"}, format="json")
+    assert client.get("/users/me/").data["balance"] == "955.00"
+
+    client.delete(f"/finance/transactions/{expense.data['id']}/")
+    user.refresh_from_db()
+    assert user.balance == Decimal("1000.00")
+
+    # The UI sends only a signed amount
+    salary = client.post("/finance/transactions/", {"amount": 2000, "category": "Salary"}, format="json")
+    assert salary.data["type"] == "income"
+    assert client.get("/users/me/").data["balance"] == "3000.00"
+
+@pytest.mark.django_db
+def test_reconcile_balances_fixes_drift():
+    user = CustomUser.objects.create_user(username='john_balance2', email='john_balance2@yahoo.com', password='pass123')
+    Transaction.objects.create(user=user, category="Salary", amount=500, type="income")
+    Transaction.objects.create(user=user, category="Food", amount=-20, type="expense")
+
+    drift = reconcile_balances(batch_size=1)
+    assert drift[user.id] == (Decimal("0.00"), Decimal("480.00"))
+    user.refresh_from_db()
+    assert user.balance == Decimal("480.00")
+    assert user.id not in reconcile_balances()
+
+@pytest.mark.django_db
+def test_transactions_listing_etag(shared_cache, django_assert_num_queries):
+    user = CustomUser.objects.create_user(username='john_etag1', email='john_etag1@yahoo.com', password='pass123')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    client.post("/finance/transactions/", {"amount": "-5.00", "type": "expense", "category": "Food"})
+
+    first = client.get("/finance/transactions/")
+    etag = first["ETag"]
+    with django_assert_num_queries(0):
+        assert client.get("/finance/transactions/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert len(client.get("/finance/transactions/").data) == 1
+
+    client.post("/finance/transactions/", {"amount": "-6.00", "type": "expense", "category": "Food"})
+    response = client.get("/finance/transactions/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert len(response.data) == 2
+    assert response["ETag"] != etag
+
+@pytest.mark.django_db
+def test_process_local_cache_sends_no_etag():
+    user = CustomUser.objects.create_user(username='john_etag2', email='john_etag2@yahoo.com', password='pass123')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    client.post("/finance/transactions/", {"amount": "-5.00", "type": "expense", "category": "Food"})
+
+    # Another worker's write would never reach this process's cache, so every read goes to the database
+    response = client.get("/finance/transactions/")
+    assert "ETag" not in response
+    Transaction.objects.create(user=user, category="Food", amount=-6, type="expense")
+    assert len(client.get("/finance/transactions/").data) == 2
+
+@pytest.mark.django_db
+def test_admin_user_list_paginates_filters_and_counts(django_assert_max_num_queries):
+    admin = CustomUser.objects.create_superuser(email="boss@example.com", username="boss", password="pass123")
+    for i in range(3):
+        guest = CustomUser.objects.create_user(email=f"guest{i}@neo.finance", username=f"Guest{i}")
+        CustomUser.objects.filter(id=guest.id).update(is_guest=True)
+        Transaction.objects.create(user=guest, amount=Decimal("5"), type="income", category="Salary")
+    # Unclaimed pooled guests are neither listed nor counted
+    refill_pool(target=5)
+    client = APIClient()
+    client.force_authenticate(user=admin)
+
+    first = client.get("/users/admin/users/", {"is_guest": "true", "page_size": 2})
+    assert first.status_code == 200
+    assert len(first.data["results"]) == 2
+    assert all(u["transaction_count"] == 1 for u in first.data["results"])
+
+    with django_assert_max_num_queries(1) as queries:
+        second = client.get("/users/admin/users/", {"is_guest": "true", "page_size": 2, "cursor": first.data["next_cursor"]})
+    assert len(second.data["results"]) == 1
+    # created_at <= cursor bounds the (created_at, id) index scan
+    assert '"created_at" <= ' in queries.captured_queries[0]["sql"]
+    assert second.data["next_cursor"] is None
+
+    search = client.get("/users/admin/users/", {"search": "BO"})
+    assert [u["email"] for u in search.data["results"]] == ["boss@example.com"]
+    assert client.get("/users/admin/users/", {"is_staff": "maybe"}).status_code == 400
+    assert client.get("/users/admin/users/stats/").data["this_year"] == 4
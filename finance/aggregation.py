@@ -0,0 +1,213 @@
+import calendar
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .filters import filter_transactions
+from .models import Report
+
+PERIOD_TRUNC = {
+    'weekly': TruncWeek,
+    'monthly': TruncMonth,
+    'yearly': TruncYear,
+}
+DEFAULT_BUCKETS = {'weekly': 12, 'monthly': 12, 'yearly': 5}
+MAX_BUCKETS = 120
+
+ZERO = Decimal('0.00')
+
+# Filters the monthly rollups cannot answer; when present, read raw transactions.
+TRANSACTION_ONLY_FILTERS = ('date_from', 'date_to', 'min_amount', 'max_amount', 'search')
+
+
+def add_months(value, months):
+    """Shift a date by whole months, clamping the day to the target month."""
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def period_start(day, period):
+    """First day of the week (Monday), month or year containing ``day``."""
+    if period == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if period == 'monthly':
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def shift_period(day, period, n):
+    if period == 'weekly':
+        return day + timedelta(weeks=n)
+    if period == 'monthly':
+        return add_months(day, n)
+    return day.replace(year=day.year + n)
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def parse_period(params):
+    period = params.get('period', 'monthly')
+    if period not in dict(Report.PERIOD_CHOICES):
+        raise ValidationError({'period': f"Invalid period: {period}"})
+
+    buckets = params.get('buckets')
+    if not buckets:
+        return period, DEFAULT_BUCKETS[period]
+    try:
+        buckets = int(buckets)
+    except ValueError:
+        raise ValidationError({'buckets': "Must be an integer"})
+    if buckets < 1:
+        raise ValidationError({'buckets': "Must be positive"})
+    return period, min(buckets, MAX_BUCKETS)
+
+
+def bucket_starts(period, buckets, today=None):
+    today = today or timezone.localdate()
+    last = period_start(today, period)
+    return [shift_period(last, period, -n) for n in range(buckets - 1, -1, -1)]
+
+
+def _grouped(queryset, since, rollup):
+    if rollup:
+        return queryset.filter(month__gte=since), {'total': Sum('total'), 'count': Sum('count')}
+    return queryset.filter(date__gte=_aware(since)), {'total': Sum('amount'), 'count': Count('id')}
+
+
+def trend(queryset, period, starts, rollup=False):
+    """Income/expense sums per bucket, oldest first, with empty buckets filled in."""
+    series = {start: {'income': ZERO, 'expense': ZERO, 'count': 0} for start in starts}
+
+    queryset, aggregates = _grouped(queryset, starts[0], rollup)
+    rows = (
+        queryset.annotate(bucket=PERIOD_TRUNC[period]('month' if rollup else 'date'))
+        .values('bucket', 'type')
+        .annotate(**aggregates)
+        .order_by()
+    )
+    for row in rows:
+        bucket = row['bucket']
+        if isinstance(bucket, datetime):
+            bucket = timezone.localtime(bucket).date()
+        entry = series.get(bucket)
+        if entry is None:
+            continue
+        entry[row['type']] += row['total']
+        entry['count'] += row['count']
+
+    return [
+        {
+            'bucket': start.isoformat(),
+            'income': str(values['income']),
+            'expense': str(values['expense']),
+            'count': values['count'],
+        }
+        for start, values in series.items()
+    ]
+
+
+def category_totals(queryset, since, rollup=False):
+    queryset, aggregates = _grouped(queryset, since, rollup)
+    rows = (
+        queryset.values('category', 'type')
+        .annotate(**aggregates)
+        .order_by('type', 'category')
+    )
+    return [
+        {
+            'category': row['category'],
+            'type': row['type'],
+            'total': str(row['total']),
+            'count': row['count'],
+        }
+        for row in rows
+    ]
+
+
+def period_totals(transactions, monthly=None, today=None):
+    """
+    Income/expense totals for the current week, month and year. Month and year
+    come from the rollups when available; the week always needs raw rows.
+    """
+    today = today or timezone.localdate()
+    starts = {
+        'week': period_start(today, 'weekly'),
+        'month': period_start(today, 'monthly'),
+        'year': period_start(today, 'yearly'),
+    }
+    from_rollups = ('month', 'year') if monthly is not None else ()
+
+    aggregates = {}
+    for name, start in starts.items():
+        if name in from_rollups:
+            continue
+        for txn_type in ('income', 'expense'):
+            aggregates[f'{name}_{txn_type}'] = Sum(
+                'amount', filter=Q(date__gte=_aware(start), type=txn_type)
+            )
+    since = min(start for name, start in starts.items() if name not in from_rollups)
+    sums = transactions.filter(date__gte=_aware(since)).aggregate(**aggregates)
+
+    if from_rollups:
+        rollup_aggregates = {}
+        for txn_type in ('income', 'expense'):
+            rollup_aggregates[f'month_{txn_type}'] = Sum('total', filter=Q(month=starts['month'], type=txn_type))
+            rollup_aggregates[f'year_{txn_type}'] = Sum('total', filter=Q(type=txn_type))
+        sums.update(monthly.filter(month__gte=starts['year']).aggregate(**rollup_aggregates))
+
+    return {
+        name: {
+            txn_type: str(sums[f'{name}_{txn_type}'] or ZERO)
+            for txn_type in ('income', 'expense')
+        }
+        for name in starts
+    }
+
+
+def summarize(transactions, monthly, params):
+    """
+    Build the dashboard payload. Reads the monthly rollups unless the request
+    needs something they cannot answer (weekly buckets or row-level filters).
+    """
+    period, buckets = parse_period(params)
+    starts = bucket_starts(period, buckets)
+
+    transactions = filter_transactions(transactions, params)
+    use_rollups = not any(params.get(name) for name in TRANSACTION_ONLY_FILTERS)
+    if use_rollups:
+        monthly = filter_transactions(monthly, params)
+    else:
+        monthly = None
+
+    if monthly is not None and period != 'weekly':
+        source, rollup = monthly, True
+    else:
+        source, rollup = transactions, False
+
+    return {
+        'period': period,
+        'buckets': buckets,
+        'trend': trend(source, period, starts, rollup),
+        'categories': category_totals(source, starts[0], rollup),
+        'totals': period_totals(transactions, monthly),
+    }
+
+
+def render_report(report, transactions, monthly):
+    data = summarize(transactions, monthly, {'period': report.time_period})
+    data['report'] = {
+        'id': str(report.id),
+        'report_type': report.report_type,
+        'time_period': report.time_period,
+        'favorite': report.favorite,
+    }
+    return data
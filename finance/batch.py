@@ -0,0 +1,102 @@
+import copy
+import uuid
+
+from django.db import transaction as db_transaction
+from rest_framework.exceptions import ValidationError
+
+from . import ledger
+from .models import Transaction
+from .serializers import TransactionSerializer
+
+MAX_OPERATIONS = 500
+OPERATIONS = ('create', 'update', 'delete')
+
+
+def _parse_id(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def apply_batch(user, operations):
+    """
+    Validate every operation, then apply the valid ones in one DB transaction
+    with bulk_create, bulk_update and a single DELETE. Ownership of every
+    referenced transaction is checked with one filter(id__in=..., user=...).
+    Returns one result per operation, in request order.
+    """
+    if not isinstance(operations, list):
+        raise ValidationError({'operations': "Expected a list of operations"})
+    if len(operations) > MAX_OPERATIONS:
+        raise ValidationError({'operations': f"At most {MAX_OPERATIONS} operations per batch"})
+
+    ids = {}
+    for op in operations:
+        if isinstance(op, dict) and op.get('op') in ('update', 'delete'):
+            txn_id = _parse_id(op.get('id'))
+            if txn_id:
+                ids[txn_id] = ids.get(txn_id, 0) + 1
+    owned = {txn.id: txn for txn in Transaction.objects.filter(id__in=list(ids), user=user)}
+
+    results = []
+    created, updated, previous, deleted = [], [], [], []
+    update_fields = set()
+
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict) or op.get('op') not in OPERATIONS:
+            results.append({'index': index, 'status': 400, 'errors': {'op': f"Must be one of {', '.join(OPERATIONS)}"}})
+            continue
+        kind = op['op']
+        result = {'index': index, 'op': kind}
+        results.append(result)
+
+        if kind == 'create':
+            serializer = TransactionSerializer(data=op.get('data') or {})
+            if not serializer.is_valid():
+                result.update(status=400, errors=serializer.errors)
+                continue
+            txn = Transaction(user=user, **serializer.validated_data)
+            created.append(txn)
+            result.update(status=201, instance=txn)
+            continue
+
+        txn_id = _parse_id(op.get('id'))
+        txn = owned.get(txn_id)
+        if txn is None:
+            result.update(status=404, errors={'id': "Transaction not found"})
+            continue
+        if ids[txn_id] > 1:
+            result.update(status=400, errors={'id': "Transaction appears in more than one operation"})
+            continue
+
+        if kind == 'delete':
+            deleted.append(txn)
+            result.update(status=204, id=str(txn.id))
+            continue
+
+        serializer = TransactionSerializer(txn, data=op.get('data') or {}, partial=True)
+        if not serializer.is_valid():
+            result.update(status=400, errors=serializer.errors)
+            continue
+        previous.append(copy.copy(txn))
+        for field, value in serializer.validated_data.items():
+            setattr(txn, field, value)
+        update_fields.update(serializer.validated_data)
+        updated.append(txn)
+        result.update(status=200, instance=txn)
+
+    with db_transaction.atomic():
+        if created:
+            Transaction.objects.bulk_create(created)
+        if updated and update_fields:
+            Transaction.objects.bulk_update(updated, sorted(update_fields))
+        if deleted:
+            Transaction.objects.filter(id__in=[txn.id for txn in deleted], user=user).delete()
+        ledger.record_changes(user.id, added=created + updated, removed=previous + deleted)
+
+    for result in results:
+        instance = result.pop('instance', None)
+        if instance is not None:
+            result['data'] = TransactionSerializer(instance).data
+    return results
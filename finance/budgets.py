@@ -0,0 +1,70 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.cache import cache
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Abs, Coalesce
+from django.utils import timezone
+
+from .cache import shared_cache, versioned_key
+from .models import Budget, Transaction
+
+STATUS_CACHE_TIMEOUT = 300
+ZERO = Decimal('0.00')
+
+
+def active_budgets(user_id, today):
+    """
+    Active budgets annotated with what was spent in their category and date
+    window. The spend is a grouped subquery per budget row, so the whole
+    status is a single query however many budgets the user has.
+    """
+    spent = (
+        Transaction.objects.filter(
+            user=OuterRef('user'),
+            category=OuterRef('category__name'),
+            type='expense',
+            date__date__gte=OuterRef('start_date'),
+            date__date__lte=OuterRef('end_date'),
+        )
+        .values('user')
+        .annotate(total=Sum(Abs('amount')))
+        .values('total')
+    )
+    return (
+        Budget.objects.filter(user_id=user_id, start_date__lte=today, end_date__gte=today)
+        .select_related('category')
+        .annotate(spent=Coalesce(Subquery(spent), Value(ZERO), output_field=DecimalField(max_digits=14, decimal_places=2)))
+        .order_by('end_date', 'category__name')
+    )
+
+
+def _status(budget):
+    remaining = budget.amount - budget.spent
+    percent = (budget.spent / budget.amount * 100) if budget.amount else Decimal('0')
+    return {
+        'id': str(budget.id),
+        'category': budget.category.name,
+        'amount': str(budget.amount),
+        'start_date': budget.start_date.isoformat(),
+        'end_date': budget.end_date.isoformat(),
+        'spent': str(budget.spent),
+        'remaining': str(remaining),
+        'percent_used': float(percent.quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)),
+        'over_budget': remaining < 0,
+    }
+
+
+def budget_status(user_id, today=None):
+    """
+    Spend-vs-limit for the user's active budgets, served from the cache until
+    a transaction or budget write changes the user's finance version.
+    """
+    today = today or timezone.localdate()
+    if not shared_cache():
+        return [_status(budget) for budget in active_budgets(user_id, today)]
+    key = versioned_key('budgets', user_id, today.isoformat())
+    status = cache.get(key)
+    if status is None:
+        status = [_status(budget) for budget in active_budgets(user_id, today)]
+        cache.set(key, status, STATUS_CACHE_TIMEOUT)
+    return status
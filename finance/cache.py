@@ -0,0 +1,101 @@
+import hashlib
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'finance:version:{user_id}'
+# Each worker process gets its own copy of these, so a write handled by one
+# worker would never retire what the others have cached
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def shared_cache():
+    """
+    True when the default cache is shared between workers (e.g. Redis). The
+    per-user caches below are only safe then and are bypassed otherwise.
+    """
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def user_version(user_id):
+    """
+    Opaque token that changes whenever the user's finance data changes. A
+    fresh random value (rather than a counter) is used when the key is
+    missing, so an evicted version can never bring back stale entries.
+    """
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_user_version(user_id):
+    cache.set(VERSION_KEY.format(user_id=user_id), uuid.uuid4().hex, None)
+
+
+def invalidate_user(user_id):
+    # Bump now so this request's follow-up reads are fresh, and again after
+    # commit so a reader racing the transaction cannot cache pre-commit data.
+    bump_user_version(user_id)
+    db_transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+def versioned_key(prefix, user_id, *parts):
+    return ':'.join(['finance', prefix, str(user_id), user_version(user_id), *map(str, parts)])
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    return any(candidate.strip() in (etag, '*') for candidate in header.split(','))
+
+
+def cached_per_user(prefix, timeout=300):
+    """
+    Cache a GET view's response data per user and per query string. The
+    ETag is derived from the user's finance version, so a matching
+    If-None-Match is answered with 304 before the view or the cache data is
+    touched. Any transaction write bumps the version and retires both.
+    Place it below @api_view so request.user is already authenticated.
+    Without a shared cache the view is always run and sends no ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method != 'GET' or not shared_cache():
+                return view(request, *args, **kwargs)
+
+            query = urlencode(sorted(request.query_params.lists()), doseq=True)
+            # Today is part of the key because several payloads are relative to it
+            digest = hashlib.sha1(f"{request.path}?{query}|{timezone.localdate()}".encode()).hexdigest()
+            key = versioned_key(prefix, request.user.id, digest)
+            etag = f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+            headers = {'ETag': etag, 'Cache-Control': 'private, no-cache', 'Vary': 'Authorization'}
+
+            if _etag_matches(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            data = cache.get(key)
+            if data is not None:
+                return Response(data, headers=headers)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and isinstance(response, Response):
+                cache.set(key, response.data, timeout)
+                for name, value in headers.items():
+                    response[name] = value
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,170 @@
+import threading
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ExchangeRate, ExchangeRateHistory
+
+CENT = Decimal('0.01')
+
+
+def base_currency():
+    return getattr(settings, 'BASE_CURRENCY', 'EUR')
+
+
+class RateTable:
+    """
+    In-process copy of the latest ExchangeRate per currency pair. Lookups hit
+    the dict; the table is reloaded after ``ttl`` seconds or when an
+    ExchangeRate row changes (see finance.signals). Rates as of a past date
+    are looked up in ExchangeRateHistory for the pairs a conversion needs.
+    """
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._rates = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'EXCHANGE_RATE_CACHE_TTL', 300)
+
+    def invalidate(self):
+        with self._lock:
+            self._rates = None
+
+    def load(self):
+        rates = {}
+        # Later rows win, leaving the most recent rate for each pair
+        for base, target, rate in ExchangeRate.objects.order_by('updated_at').values_list(
+            'base_currency', 'target_currency', 'rate'
+        ):
+            rates[(base.upper(), target.upper())] = rate
+        return rates
+
+    def rates(self):
+        rates = self._rates
+        if rates is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return rates
+        with self._lock:
+            if self._rates is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._rates = self.load()
+                self._loaded_at = time.monotonic()
+            return self._rates
+
+    def rate(self, source, target, as_of=None):
+        """
+        Units of ``target`` per unit of ``source``, or None when no path
+        exists. With ``as_of``, use the rates in effect at that moment.
+        """
+        source, target = source.upper(), target.upper()
+        if source == target:
+            return Decimal('1')
+        rates = self.rates() if as_of is None else RatesAsOf(as_of)
+        return self._rate(source, target, rates)
+
+    def _rate(self, source, target, rates):
+        if source == target:
+            return Decimal('1')
+
+        direct = rates.get((source, target))
+        if direct is not None:
+            return direct
+        inverse = rates.get((target, source))
+        if inverse:
+            return 1 / inverse
+
+        base = base_currency().upper()
+        if base in (source, target):
+            return None
+        to_base = self._rate(source, base, rates)
+        from_base = self._rate(base, target, rates)
+        if to_base is None or from_base is None:
+            return None
+        return to_base * from_base
+
+
+def rate_as_of(base, target, as_of):
+    """
+    The ``base`` to ``target`` rate in effect at ``as_of``. Dates before the
+    pair's first history point get its earliest known rate.
+    """
+    points = ExchangeRateHistory.objects.filter(base_currency=base, target_currency=target)
+    rate = points.filter(updated_at__lte=as_of).order_by('-updated_at').values_list('rate', flat=True).first()
+    if rate is None:
+        rate = points.order_by('updated_at').values_list('rate', flat=True).first()
+    return rate
+
+
+class RatesAsOf:
+    """Rates at ``as_of``, queried one pair at a time and only for the pairs a conversion asks for."""
+
+    def __init__(self, as_of):
+        self.as_of = as_of
+        self._rates = {}
+
+    def get(self, pair):
+        if pair not in self._rates:
+            self._rates[pair] = rate_as_of(*pair, self.as_of)
+        return self._rates[pair]
+
+
+rate_table = RateTable()
+
+
+def convert(amount, source, target=None, table=None, as_of=None):
+    target = target or base_currency()
+    rate = (table or rate_table).rate(source, target, as_of)
+    if rate is None or amount is None:
+        return None
+    return (Decimal(amount) * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _rate_at(base, target):
+    points = ExchangeRateHistory.objects.filter(base_currency=base, target_currency=target)
+    # Dates before the pair's first point fall back to its earliest rate, as in rate_as_of()
+    return Coalesce(
+        Subquery(points.filter(updated_at__lte=OuterRef('date')).order_by('-updated_at').values('rate')[:1]),
+        Subquery(points.order_by('updated_at').values('rate')[:1]),
+    )
+
+
+def with_rates_as_of(transactions, target=None):
+    """
+    Annotate each transaction with the direct and inverse rate in effect at
+    its date. Each lookup is a pair of correlated LIMIT 1 subqueries that
+    Postgres runs as index probes on (base, target, updated_at), so the
+    whole batch is one query.
+    """
+    target = (target or base_currency()).upper()
+    return transactions.annotate(
+        direct_rate=_rate_at(OuterRef('currency'), target),
+        inverse_rate=_rate_at(target, OuterRef('currency')),
+    )
+
+
+def convert_as_of(transactions, target=None):
+    """Return {transaction id: amount in ``target`` at the transaction's date}."""
+    target = (target or base_currency()).upper()
+    rows = with_rates_as_of(transactions, target).values_list(
+        'id', 'amount', 'currency', 'direct_rate', 'inverse_rate'
+    )
+    converted = {}
+    for txn_id, amount, currency, direct, inverse in rows:
+        if currency.upper() == target:
+            rate = Decimal('1')
+        elif direct is not None:
+            rate = direct
+        elif inverse:
+            rate = 1 / inverse
+        else:
+            converted[txn_id] = None
+            continue
+        converted[txn_id] = (amount * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+    return converted
@@ -0,0 +1,48 @@
+import csv
+import json
+
+from django.utils import timezone
+
+from .serializers import format_datetime, format_decimal
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = ['id', 'date', 'description', 'amount', 'type', 'category', 'recurrence']
+CSV_HEADERS = ['Transaction ID', 'Date', 'Description', 'Amount', 'Type', 'Category', 'Recurrence']
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose write() hands the formatted line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset):
+    tz = timezone.get_current_timezone()
+    rows = queryset.order_by('-date', '-id').values_list(*EXPORT_FIELDS)
+    for txn_id, date, description, amount, txn_type, category, recurrence in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [str(txn_id), format_datetime(date, tz), description or '', format_decimal(amount), txn_type, category, recurrence]
+
+
+def stream_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADERS)
+    for row in _rows(queryset):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset):
+    for row in _rows(queryset):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
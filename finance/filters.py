@@ -0,0 +1,77 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Transaction
+
+
+def _parse_bound(value, name, end=False):
+    """
+    Accepts a date (YYYY-MM-DD) or an ISO datetime. A bare date used as an
+    upper bound covers the whole day.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: f"Invalid date: {value}"})
+        if end:
+            day = day + timedelta(days=1)
+        parsed = datetime.combine(day, time.min)
+        return timezone.make_aware(parsed), end
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed, False
+
+
+def _parse_amount(value, name):
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValidationError({name: f"Invalid amount: {value}"})
+
+
+def filter_transactions(queryset, params):
+    """
+    Apply the listing filters from a query dict:
+      type, category (comma separated), date_from, date_to,
+      min_amount, max_amount, search (description)
+    """
+    txn_type = params.get('type')
+    if txn_type:
+        if txn_type not in dict(Transaction.TYPE_CHOICES):
+            raise ValidationError({'type': f"Invalid type: {txn_type}"})
+        queryset = queryset.filter(type=txn_type)
+
+    category = params.get('category')
+    if category:
+        categories = [c.strip() for c in category.split(',') if c.strip()]
+        queryset = queryset.filter(category__in=categories)
+
+    date_from = params.get('date_from')
+    if date_from:
+        start, _ = _parse_bound(date_from, 'date_from')
+        queryset = queryset.filter(date__gte=start)
+
+    date_to = params.get('date_to')
+    if date_to:
+        end, exclusive = _parse_bound(date_to, 'date_to', end=True)
+        queryset = queryset.filter(date__lt=end) if exclusive else queryset.filter(date__lte=end)
+
+    min_amount = params.get('min_amount')
+    if min_amount:
+        queryset = queryset.filter(amount__gte=_parse_amount(min_amount, 'min_amount'))
+
+    max_amount = params.get('max_amount')
+    if max_amount:
+        queryset = queryset.filter(amount__lte=_parse_amount(max_amount, 'max_amount'))
+
+    search = params.get('search')
+    if search:
+        queryset = queryset.filter(description__icontains=search.strip())
+
+    return queryset
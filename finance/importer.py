@@ -0,0 +1,136 @@
+import codecs
+import csv
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import ledger
+from .currency import convert, convert_as_of
+from .models import Transaction
+from .serializers import TransactionSerializer
+
+MAX_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+# Formats produced by TransactionsToCsv.js ("05 May 2025" + "10:30 AM") and common spreadsheets
+DATE_FORMATS = ['%d %B %Y', '%d %b %Y', '%d/%m/%Y', '%Y/%m/%d']
+TIME_FORMATS = ['%I:%M %p', '%H:%M', '%H:%M:%S']
+
+
+def get_batch_size(params):
+    default = getattr(settings, 'FINANCE_IMPORT_BATCH_SIZE', 1000)
+    value = params.get('batch_size')
+    if not value:
+        return default
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValidationError({'batch_size': "Must be an integer"})
+    if size < 1:
+        raise ValidationError({'batch_size': "Must be positive"})
+    return min(size, MAX_BATCH_SIZE)
+
+
+def column(row, name):
+    value = row.get(name.capitalize(), row.get(name, ''))
+    return (value or '').strip()
+
+
+def _parse_date(date_value, time_value):
+    """
+    Return an ISO string the serializer accepts. Values it already understands
+    are passed through unchanged so it reports the error if they are invalid.
+    """
+    for date_format in DATE_FORMATS:
+        try:
+            day = datetime.strptime(date_value, date_format)
+        except ValueError:
+            continue
+        for time_format in TIME_FORMATS:
+            try:
+                clock = datetime.strptime(time_value, time_format).time()
+            except ValueError:
+                continue
+            day = datetime.combine(day.date(), clock)
+            break
+        return timezone.make_aware(day).isoformat()
+    return date_value
+
+
+def row_to_data(row):
+    data = {
+        'description': column(row, 'description'),
+        'amount': column(row, 'amount'),
+        'category': column(row, 'category'),
+    }
+    txn_type = column(row, 'type').lower()
+    if not txn_type and data['amount']:
+        txn_type = 'expense' if data['amount'].startswith('-') else 'income'
+    if txn_type:
+        data['type'] = txn_type
+
+    currency = column(row, 'currency')
+    if currency:
+        data['currency'] = currency.upper()
+
+    date = column(row, 'date')
+    if date:
+        data['date'] = _parse_date(date, column(row, 'time'))
+    return data
+
+
+def _flush(user, pending, batch_size):
+    Transaction.objects.bulk_create(pending, batch_size=batch_size)
+    # Historical rows convert at the rate of their own date: one lookup query
+    # for the whole batch; only pairs with no direct or inverse rate go per row
+    converted = convert_as_of(Transaction.objects.filter(id__in=[txn.id for txn in pending]))
+    for txn in pending:
+        txn.converted_amount = converted.get(txn.id)
+        if txn.converted_amount is None:
+            txn.converted_amount = convert(txn.amount, txn.currency, as_of=txn.date)
+    Transaction.objects.bulk_update(pending, ['converted_amount'], batch_size=batch_size)
+    ledger.record_changes(user.id, added=pending)
+    return len(pending)
+
+
+def import_transactions(user, uploaded_file, batch_size):
+    """
+    Stream the CSV line by line, validate each row and insert the valid ones
+    with bulk_create every ``batch_size`` rows. Only one batch is held in
+    memory, and at most MAX_REPORTED_ERRORS row errors are kept.
+    """
+    reader = csv.DictReader(codecs.iterdecode(uploaded_file, 'utf-8-sig'))
+    validator = TransactionSerializer(context={'convert': False})
+
+    created = failed = 0
+    errors = []
+    pending = []
+
+    with db_transaction.atomic():
+        # Row 1 is the header, so data rows are numbered from 2 like in a spreadsheet
+        for line, row in enumerate(reader, start=2):
+            try:
+                validated = validator.run_validation(row_to_data(row))
+            except ValidationError as e:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'row': line, 'errors': e.detail})
+                continue
+
+            pending.append(Transaction(user=user, **validated))
+            if len(pending) >= batch_size:
+                created += _flush(user, pending, batch_size)
+                pending = []
+
+        if pending:
+            created += _flush(user, pending, batch_size)
+
+    return {
+        'created': created,
+        'failed': failed,
+        'errors': errors,
+        'errors_truncated': failed > len(errors),
+    }
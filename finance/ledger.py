@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+from django.db.models import F, Sum
+
+from users.models import CustomUser
+
+from . import cache, rollups
+from .models import Transaction
+
+RECONCILE_BATCH_SIZE = 500
+
+
+def balance_delta(added=(), removed=()):
+    """The stored sign of ``amount`` is the truth, as in the rollups: expenses are negative."""
+    return sum((Decimal(txn.amount) for txn in added), Decimal('0')) - sum((Decimal(txn.amount) for txn in removed), Decimal('0'))
+
+
+def record_changes(user_id, added=(), removed=()):
+    """
+    Side effects of writing transactions for one user. Every write path
+    (views, serializer, import, batch, recurrence) calls this inside the
+    write's atomic block with the rows it added and removed; an update is
+    the old row removed and the new one added.
+    """
+    if not added and not removed:
+        return
+    rollups.record(user_id, added=added, removed=removed)
+
+    delta = balance_delta(added, removed)
+    if delta:
+        CustomUser.objects.filter(id=user_id).update(balance=F('balance') + delta)
+
+    cache.invalidate_user(user_id)
+
+
+def expected_balances(user_ids):
+    rows = (
+        Transaction.objects.filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    return {row['user_id']: row['total'] for row in rows}
+
+
+def reconcile_balances(batch_size=RECONCILE_BATCH_SIZE, fix=True):
+    """
+    Recompute balances from Transaction for users in id-ordered batches (one
+    grouped query per batch) and report drift as {user_id: (stored, expected)}.
+    A fix only lands if the stored balance is unchanged since it was read,
+    so a concurrent delta is never overwritten.
+    """
+    drift = {}
+    users = CustomUser.objects.order_by('id').values_list('id', 'balance')
+    last_id = None
+
+    while True:
+        page = users if last_id is None else users.filter(id__gt=last_id)
+        batch = list(page[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        expected = expected_balances([user_id for user_id, _ in batch])
+        for user_id, stored in batch:
+            total = expected.get(user_id) or Decimal('0.00')
+            if stored == total:
+                continue
+            drift[user_id] = (stored, total)
+            if fix:
+                CustomUser.objects.filter(id=user_id, balance=stored).update(balance=total)
+    return drift
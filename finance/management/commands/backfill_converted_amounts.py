@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from finance.currency import convert, convert_as_of, rate_table
+from finance.models import Transaction
+
+class Command(BaseCommand):
+    help = 'Fill Transaction.converted_amount in the base currency, in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows updated per bulk_update')
+        parser.add_argument('--all', action='store_true', help='Recompute rows that already have a converted amount')
+        parser.add_argument('--historical', action='store_true', help='Use the rate in effect at each transaction date')
+
+    def handle(self, *args, **options):
+        rate_table.invalidate()
+        queryset = Transaction.objects.order_by('id').only('id', 'amount', 'currency')
+        if not options['all']:
+            queryset = queryset.filter(converted_amount__isnull=True)
+
+        updated = missing = 0
+        last_id = None
+        while True:
+            page = queryset if last_id is None else queryset.filter(id__gt=last_id)
+            chunk = list(page[:options['chunk_size']])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+
+            if options['historical']:
+                as_of = convert_as_of(Transaction.objects.filter(id__in=[txn.id for txn in chunk]))
+            for txn in chunk:
+                if options['historical']:
+                    txn.converted_amount = as_of.get(txn.id)
+                else:
+                    txn.converted_amount = convert(txn.amount, txn.currency)
+                if txn.converted_amount is None:
+                    missing += 1
+            Transaction.objects.bulk_update(chunk, ['converted_amount'])
+            updated += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f'Converted {updated - missing} transactions'))
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} transactions have no exchange rate path'))
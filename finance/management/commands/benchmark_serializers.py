@@ -0,0 +1,58 @@
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from finance.models import Transaction
+from finance.serializers import TransactionSerializer, serialize_transactions
+from users.models import CustomUser
+
+class Command(BaseCommand):
+    help = 'Compare TransactionSerializer with the values_list fast path; test rows are rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000], help='Row counts to benchmark')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best time is reported')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>8} {'serializer':>12} {'fast path':>12} {'speedup':>8}")
+        for count in options['rows']:
+            with db_transaction.atomic():
+                queryset = self.seed(count)
+                slow = self.best(lambda: TransactionSerializer(queryset, many=True).data, options['repeat'])
+                fast = self.best(lambda: serialize_transactions(queryset), options['repeat'])
+                db_transaction.set_rollback(True)
+            self.stdout.write(f"{count:>8} {slow * 1000:>10.1f}ms {fast * 1000:>10.1f}ms {slow / fast:>7.1f}x")
+
+    def seed(self, count):
+        suffix = uuid.uuid4().hex[:8]
+        user = CustomUser.objects.create_user(email=f"bench-{suffix}@neo.finance", username=f"bench-{suffix}")
+        now = timezone.now()
+        categories = [choice for choice, _ in Transaction.CATEGORY_CHOICES]
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user=user,
+                    category=categories[i % len(categories)],
+                    amount=Decimal(i % 500) - Decimal('250.25'),
+                    converted_amount=Decimal(i % 500),
+                    type='income' if i % 3 == 0 else 'expense',
+                    description=f"Benchmark row {i}",
+                    date=now - timedelta(minutes=i),
+                )
+                for i in range(count)
+            ],
+            batch_size=5000,
+        )
+        return Transaction.objects.filter(user=user).order_by('-date')
+
+    def best(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,82 @@
+import csv
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from finance.currency import rate_table
+from finance.models import ExchangeRate, ExchangeRateHistory
+
+class Command(BaseCommand):
+    help = 'Append daily exchange rates from a CSV file (date,base_currency,target_currency,rate) to the rate history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with date, base_currency, target_currency and rate columns')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per bulk_create')
+
+    def handle(self, *args, **options):
+        skipped = 0
+        latest = {}
+        batch = []
+
+        try:
+            handle = open(options['path'], newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        # Rows already in the history are ignored as conflicts; only new ones are reported
+        before = ExchangeRateHistory.objects.count()
+        with handle:
+            for row in csv.DictReader(handle):
+                point = self.parse(row)
+                if point is None:
+                    skipped += 1
+                    continue
+                batch.append(point)
+                key = (point.base_currency, point.target_currency)
+                if key not in latest or latest[key].updated_at < point.updated_at:
+                    latest[key] = point
+                if len(batch) >= options['batch_size']:
+                    ExchangeRateHistory.objects.bulk_create(batch, ignore_conflicts=True)
+                    batch = []
+        if batch:
+            ExchangeRateHistory.objects.bulk_create(batch, ignore_conflicts=True)
+        loaded = ExchangeRateHistory.objects.count() - before
+
+        # Keep the "latest rate" table in step with the newest point per pair
+        for (base, target), point in latest.items():
+            current = ExchangeRate.objects.filter(base_currency=base, target_currency=target).order_by('-updated_at').first()
+            if current is None:
+                ExchangeRate.objects.create(base_currency=base, target_currency=target, rate=point.rate, updated_at=point.updated_at)
+            elif current.updated_at < point.updated_at:
+                current.rate = point.rate
+                current.updated_at = point.updated_at
+                current.save()
+        rate_table.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(f'Loaded {loaded} rates'))
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {skipped} invalid rows'))
+
+    def parse(self, row):
+        value = (row.get('date') or '').strip()
+        when = parse_datetime(value)
+        if when is None:
+            day = parse_date(value) if value else None
+            if day is None:
+                return None
+            when = timezone.make_aware(datetime.combine(day, time.min))
+        elif timezone.is_naive(when):
+            when = timezone.make_aware(when)
+
+        try:
+            rate = Decimal((row.get('rate') or '').strip())
+        except InvalidOperation:
+            return None
+
+        base = (row.get('base_currency') or '').strip().upper()
+        target = (row.get('target_currency') or '').strip().upper()
+        if not base or not target:
+            return None
+        return ExchangeRateHistory(base_currency=base, target_currency=target, rate=rate, updated_at=when)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from finance import rollups
+from users.models import CustomUser
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly transaction rollups from scratch, or report drift with --check'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report rollup rows that differ from the transactions')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users processed per batch')
+
+    def handle(self, *args, **options):
+        user_ids = CustomUser.objects.order_by('id').values_list('id', flat=True)
+        batch = []
+        drifted = rebuilt = 0
+
+        for user_id in user_ids.iterator(chunk_size=options['batch_size']):
+            batch.append(user_id)
+            if len(batch) == options['batch_size']:
+                drifted, rebuilt = self.process(batch, options['check'], drifted, rebuilt)
+                batch = []
+        if batch:
+            drifted, rebuilt = self.process(batch, options['check'], drifted, rebuilt)
+
+        if options['check']:
+            style = self.style.SUCCESS if not drifted else self.style.WARNING
+            self.stdout.write(style(f'{drifted} rollup rows drifted'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} rollup rows'))
+
+    def process(self, user_ids, check, drifted, rebuilt):
+        if check:
+            drift = rollups.find_drift(user_ids)
+            for (user_id, month, category, txn_type), (actual, expected) in drift.items():
+                self.stdout.write(f'{user_id} {month:%Y-%m} {category} ({txn_type}): stored {actual}, expected {expected}')
+            return drifted + len(drift), rebuilt
+        return drifted, rebuilt + rollups.rebuild(user_ids)
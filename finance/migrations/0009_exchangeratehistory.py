@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:10
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+def seed_history(apps, schema_editor):
+    ExchangeRate = apps.get_model('finance', 'ExchangeRate')
+    ExchangeRateHistory = apps.get_model('finance', 'ExchangeRateHistory')
+    ExchangeRateHistory.objects.bulk_create(
+        [
+            ExchangeRateHistory(
+                base_currency=rate.base_currency,
+                target_currency=rate.target_currency,
+                rate=rate.rate,
+                updated_at=rate.updated_at,
+            )
+            for rate in ExchangeRate.objects.all()
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_transaction_recurrence_materialization'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRateHistory',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('base_currency', models.CharField(max_length=10)),
+                ('target_currency', models.CharField(max_length=10)),
+                ('rate', models.DecimalField(decimal_places=4, max_digits=10)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('base_currency', 'target_currency', 'updated_at'), name='unique_rate_history_point')],
+            },
+        ),
+        migrations.RunPython(seed_history, migrations.RunPython.noop),
+    ]
@@ -74,6 +74,20 @@ class Transaction(models.Model):
     description = models.TextField(blank=True, null=True)
     recurrence = models.CharField(max_length=10, choices=RECURRENCE_CHOICES, default='none')
     type = models.CharField(max_length=10, choices=TYPE_CHOICES, default='expense')
+    # Occurrences generated from a recurring transaction point back at it
+    recurrence_source = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='occurrences')
+    occurrence_date = models.DateField(null=True, blank=True)
+    # Date of the last occurrence generated for a recurring transaction
+    materialized_through = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-date', '-id'], name='transaction_user_date_id_idx'),
+            models.Index(fields=['id'], condition=~models.Q(recurrence='none'), name='transaction_recurring_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['recurrence_source', 'occurrence_date'], name='unique_recurrence_occurrence'),
+        ]
 
     def __str__(self):
         return f"{self.amount} - {self.category}"
@@ -108,6 +122,22 @@ class Report(models.Model):
         return f"{self.report_type} report - {self.time_period}"
 
 
+class MonthlyRollup(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='monthly_rollups')
+    month = models.DateField()
+    category = models.CharField(max_length=20, choices=Transaction.CATEGORY_CHOICES)
+    type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'month', 'category', 'type')
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.category} ({self.type}): {self.total}"
+
+
 class ExchangeRate(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     base_currency = models.CharField(max_length=10)
@@ -117,3 +147,19 @@ class ExchangeRate(models.Model):
 
     def __str__(self):
         return f"{self.base_currency} → {self.target_currency}: {self.rate}"
+
+
+class ExchangeRateHistory(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    base_currency = models.CharField(max_length=10)
+    target_currency = models.CharField(max_length=10)
+    rate = models.DecimalField(max_digits=10, decimal_places=4)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['base_currency', 'target_currency', 'updated_at'], name='unique_rate_history_point'),
+        ]
+
+    def __str__(self):
+        return f"{self.base_currency} → {self.target_currency}: {self.rate} @ {self.updated_at:%Y-%m-%d}"
@@ -0,0 +1,73 @@
+import base64
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .serializers import serialize_transactions
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(moment, pk):
+    raw = f"{moment}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        moment_part, id_part = raw.rsplit('|', 1)
+        moment = parse_datetime(moment_part)
+        pk = uuid.UUID(id_part)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({'cursor': "Invalid cursor"})
+    if moment is None:
+        raise ValidationError({'cursor': "Invalid cursor"})
+    return moment, pk
+
+
+def get_page_size(params, maximum=MAX_PAGE_SIZE):
+    value = params.get('page_size')
+    if not value:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValidationError({'page_size': "Must be an integer"})
+    if size < 1:
+        raise ValidationError({'page_size': "Must be positive"})
+    return min(size, maximum)
+
+
+def after_cursor(queryset, field, cursor):
+    """Rows that come after ``cursor`` in (-field, -id) order."""
+    moment, pk = decode_cursor(cursor)
+    # field <= cursor bounds the index range scan; the OR only settles ties
+    return queryset.filter(
+        Q(**{f'{field}__lt': moment}) | Q(**{field: moment, 'id__lt': pk}),
+        **{f'{field}__lte': moment},
+    )
+
+
+def paginate_transactions(queryset, params):
+    """
+    Keyset pagination on (date, id), newest first. Every page is a range scan
+    on the (user, date, id) index, no matter how deep the cursor is.
+    Returns (serialized rows, next_cursor).
+    """
+    page_size = get_page_size(params)
+    queryset = queryset.order_by('-date', '-id')
+
+    cursor = params.get('cursor')
+    if cursor:
+        queryset = after_cursor(queryset, 'date', cursor)
+
+    rows = serialize_transactions(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1]['date'], rows[-1]['id'])
+    return rows, next_cursor
@@ -0,0 +1,139 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import ledger
+from .aggregation import add_months
+from .models import Transaction
+
+BATCH_SIZE = 500
+# Bounds a single run for a series with a long backlog; the rest follows next run
+MAX_OCCURRENCES_PER_RUN = 366
+
+STEPS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    # Shortest possible month, used only to pre-select candidates in SQL
+    'monthly': timedelta(days=28),
+}
+
+
+def occurrence(source, index):
+    """The ``index``-th occurrence of a series; 0 is the source itself."""
+    if source.recurrence == 'monthly':
+        local = timezone.localtime(source.date)
+        return add_months(local, index)
+    return source.date + STEPS[source.recurrence] * index
+
+
+def next_index(source):
+    """
+    Index of the first occurrence after the series' high-water mark. Never
+    below 1: occurrence 0 is the source itself, and the source's date may
+    have been moved past the mark.
+    """
+    if source.materialized_through is None:
+        return 1
+    if source.recurrence == 'monthly':
+        anchor = timezone.localtime(source.date)
+        mark = timezone.localtime(source.materialized_through)
+        index = (mark.year - anchor.year) * 12 + mark.month - anchor.month + 1
+    else:
+        index = (source.materialized_through - source.date) // STEPS[source.recurrence] + 1
+    return max(index, 1)
+
+
+def due_occurrences(source, now):
+    dates = []
+    index = next_index(source)
+    while len(dates) < MAX_OCCURRENCES_PER_RUN:
+        when = occurrence(source, index)
+        if when > now:
+            break
+        dates.append(when)
+        index += 1
+    return dates
+
+
+def _build(source, when):
+    return Transaction(
+        user_id=source.user_id,
+        category=source.category,
+        amount=source.amount,
+        currency=source.currency,
+        converted_amount=source.converted_amount,
+        description=source.description,
+        type=source.type,
+        date=when,
+        recurrence='none',
+        recurrence_source=source,
+        occurrence_date=timezone.localtime(when).date(),
+    )
+
+
+def due_sources(now):
+    """Recurring series whose next occurrence may be due, selected in SQL."""
+    due = Q()
+    for recurrence, step in STEPS.items():
+        due |= Q(recurrence=recurrence, watermark__lte=now - step)
+    return (
+        Transaction.objects.filter(recurrence_source__isnull=True)
+        .exclude(recurrence='none')
+        .annotate(watermark=Coalesce('materialized_through', 'date'))
+        .filter(due)
+        .order_by('id')
+    )
+
+
+def materialize_batch(sources, now):
+    occurrences = []
+    advanced = []
+    for source in sources:
+        dates = due_occurrences(source, now)
+        if not dates:
+            continue
+        occurrences.extend(_build(source, when) for when in dates)
+        source.materialized_through = dates[-1]
+        advanced.append(source)
+
+    if not occurrences:
+        return 0
+
+    with db_transaction.atomic():
+        # The unique (source, occurrence_date) key makes re-runs no-ops
+        Transaction.objects.bulk_create(occurrences, ignore_conflicts=True)
+        inserted = set(
+            Transaction.objects.filter(id__in=[o.id for o in occurrences]).values_list('id', flat=True)
+        )
+        by_user = defaultdict(list)
+        for txn in occurrences:
+            if txn.id in inserted:
+                by_user[txn.user_id].append(txn)
+        for user_id, txns in by_user.items():
+            ledger.record_changes(user_id, added=txns)
+        Transaction.objects.bulk_update(advanced, ['materialized_through'])
+    return len(inserted)
+
+
+def materialize_due_occurrences(now=None, batch_size=BATCH_SIZE):
+    """
+    Insert every due occurrence of every recurring transaction, walking the
+    due series in id order one batch at a time. Returns the number created.
+    """
+    now = now or timezone.now()
+    sources = due_sources(now)
+    created = 0
+    last_id = None
+
+    while True:
+        page = sources if last_id is None else sources.filter(id__gt=last_id)
+        batch = list(page[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        created += materialize_batch(batch, now)
+    return created
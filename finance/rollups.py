@@ -0,0 +1,106 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import MonthlyRollup, Transaction
+
+
+def month_of(txn):
+    return timezone.localtime(txn.date).date().replace(day=1)
+
+
+def collect_deltas(added=(), removed=()):
+    """
+    Fold transactions into {(month, category, type): [total, count]} so a
+    whole batch costs one UPDATE per touched rollup row.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for sign, txns in ((1, added), (-1, removed)):
+        for txn in txns:
+            entry = deltas[(month_of(txn), txn.category, txn.type)]
+            entry[0] += sign * Decimal(txn.amount)
+            entry[1] += sign
+    return {key: value for key, value in deltas.items() if value != [0, 0]}
+
+
+def apply_deltas(user_id, deltas):
+    emptied = False
+    for (month, category, txn_type), (total, count) in deltas.items():
+        rollup = MonthlyRollup.objects.filter(user_id=user_id, month=month, category=category, type=txn_type)
+        if rollup.update(total=F('total') + total, count=F('count') + count):
+            emptied = emptied or count < 0
+            continue
+        if count <= 0:
+            # Removing or editing a transaction the rollups never counted;
+            # rebuild_rollups recomputes such rows from Transaction
+            continue
+        try:
+            with transaction.atomic():
+                MonthlyRollup.objects.create(
+                    user_id=user_id, month=month, category=category, type=txn_type,
+                    total=total, count=count,
+                )
+        except IntegrityError:
+            # Another writer created the row between our UPDATE and INSERT
+            rollup.update(total=F('total') + total, count=F('count') + count)
+
+    if emptied:
+        MonthlyRollup.objects.filter(user_id=user_id, count__lte=0).delete()
+
+
+def record(user_id, added=(), removed=()):
+    """Apply the rollup side of a transaction write; call inside the write's atomic block."""
+    deltas = collect_deltas(added, removed)
+    if deltas:
+        apply_deltas(user_id, deltas)
+
+
+def compute(user_ids):
+    """Rollup rows rebuilt from Transaction with one grouped query."""
+    rows = (
+        Transaction.objects.filter(user_id__in=user_ids)
+        .annotate(month=TruncMonth('date', output_field=DateField()))
+        .values('user_id', 'month', 'category', 'type')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    return {
+        (row['user_id'], row['month'], row['category'], row['type']): (row['total'], row['count'])
+        for row in rows
+    }
+
+
+def stored(user_ids):
+    rows = MonthlyRollup.objects.filter(user_id__in=user_ids).values_list(
+        'user_id', 'month', 'category', 'type', 'total', 'count'
+    )
+    return {tuple(row[:4]): (row[4], row[5]) for row in rows}
+
+
+def find_drift(user_ids):
+    """Keys whose stored (total, count) differs from the recomputed value."""
+    expected = compute(user_ids)
+    actual = stored(user_ids)
+    return {
+        key: (actual.get(key), expected.get(key))
+        for key in expected.keys() | actual.keys()
+        if expected.get(key) != actual.get(key)
+    }
+
+
+def rebuild(user_ids):
+    expected = compute(user_ids)
+    with transaction.atomic():
+        MonthlyRollup.objects.filter(user_id__in=user_ids).delete()
+        MonthlyRollup.objects.bulk_create(
+            [
+                MonthlyRollup(user_id=user_id, month=month, category=category, type=txn_type, total=total, count=count)
+                for (user_id, month, category, txn_type), (total, count) in expected.items()
+            ],
+            batch_size=1000,
+        )
+    return len(expected)
@@ -1,6 +1,13 @@
+import copy
+from django.db import transaction as db_transaction
 from rest_framework import serializers
 from .models import Transaction, Category
+from . import ledger
+from .currency import convert
 from datetime import datetime
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django.utils import timezone
 
 class TransactionSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(write_only=True)  
@@ -8,15 +15,85 @@ class TransactionSerializer(serializers.ModelSerializer):
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
-        fields = ['id', 'user', 'description', 'amount', 'type', 'date', 'category', 'recurrence']
-        read_only_fields = ['id', 'user']
+        fields = ['id', 'user', 'description', 'amount', 'currency', 'converted_amount', 'type', 'date', 'category', 'recurrence']
+        read_only_fields = ['id', 'user', 'converted_amount']
+
+    def validate(self, attrs):
+        # converted_amount is filled here so every write path (views, batch)
+        # stores it, at the rate in effect on the transaction's date; the CSV
+        # import passes convert=False and converts each batch in one query
+        amount = attrs.get('amount', getattr(self.instance, 'amount', None))
+        currency = attrs.get('currency', getattr(self.instance, 'currency', None))
+        currency = currency or Transaction._meta.get_field('currency').default
+        if self.instance is None and 'type' not in attrs and amount is not None:
+            # Clients may send only a signed amount (AddTransactionModal does)
+            attrs['type'] = 'expense' if amount < 0 else 'income'
+        date = attrs.get('date', getattr(self.instance, 'date', None)) or timezone.now()
+        if amount is not None and self.context.get('convert', True):
+            attrs['converted_amount'] = convert(amount, currency, as_of=date)
+        return attrs
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        with db_transaction.atomic():
+            instance = super().create(validated_data)
+            ledger.record_changes(instance.user_id, added=[instance])
+        return instance
+
+    def update(self, instance, validated_data):
+        previous = copy.copy(instance)
+        with db_transaction.atomic():
+            instance = super().update(instance, validated_data)
+            ledger.record_changes(instance.user_id, added=[instance], removed=[previous])
+        return instance
     
     def get_date(self, obj):
         return obj.created_at.strftime("%d %b %y")  
 
     def get_time(self, obj):
         return obj.created_at.strftime("%I.%M %p")
+
+
+
+def format_datetime(value, tz=None):
+    """Same output as DRF's DateTimeField: ISO 8601 in the current timezone, UTC as 'Z'."""
+    value = value.astimezone(tz or timezone.get_current_timezone()).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def format_decimal(value):
+    return None if value is None else format(value, 'f')
+
+
+def serialize_transactions(queryset):
+    """
+    Read-only fast path producing exactly TransactionSerializer(many=True).data.
+    Rows come from values_list() as tuples, skipping model instantiation and
+    per-field to_representation calls; UUIDs are cast to text in SQL so no
+    uuid.UUID objects are built. Use it wherever nothing is written.
+    """
+    tz = timezone.get_current_timezone()
+    rows = queryset.annotate(
+        id_text=Cast('id', output_field=CharField()),
+        user_text=Cast('user_id', output_field=CharField()),
+    ).values_list(
+        'id_text', 'user_text', 'description', 'amount', 'currency', 'converted_amount',
+        'type', 'date', 'category', 'recurrence',
+    )
+    return [
+        {
+            'id': txn_id,
+            'user': user_id,
+            'description': description,
+            'amount': format_decimal(amount),
+            'currency': currency,
+            'converted_amount': format_decimal(converted_amount),
+            'type': txn_type,
+            'date': format_datetime(date, tz),
+            'category': category,
+            'recurrence': recurrence,
+        }
+        for txn_id, user_id, description, amount, currency, converted_amount, txn_type, date, category, recurrence in rows
+    ]
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_user
+from .currency import rate_table
+from .models import Budget, Category, ExchangeRate, ExchangeRateHistory, Report
+
+
+@receiver([post_save, post_delete], sender=ExchangeRate)
+def invalidate_rate_table(sender, **kwargs):
+    rate_table.invalidate()
+
+
+@receiver(post_save, sender=ExchangeRate)
+def append_rate_history(sender, instance, **kwargs):
+    ExchangeRateHistory.objects.get_or_create(
+        base_currency=instance.base_currency,
+        target_currency=instance.target_currency,
+        updated_at=instance.updated_at,
+        defaults={'rate': instance.rate},
+    )
+
+
+@receiver([post_save, post_delete], sender=Budget)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Report)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
@@ -3,6 +3,12 @@ from . import views
 
 urlpatterns = [
     path('transactions/', views.transactions_view, name='transactions'),
+    path('transactions/batch/', views.batch_transactions, name='batch-transactions'),
+    path('transactions/export/', views.export_transactions, name='export-transactions'),
+    path('transactions/import/', views.import_transactions_view, name='import-transactions'),
     path('transactions/<uuid:transaction_id>/', views.delete_transaction, name='delete-transaction'),
     path('transactions/<uuid:transaction_id>/update/', views.update_transaction, name='update-transaction'),
+    path('budgets/status/', views.budgets_status, name='budgets-status'),
+    path('summary/', views.transactions_summary, name='transactions-summary'),
+    path('reports/<uuid:report_id>/data/', views.report_data, name='report-data'),
 ]
\ No newline at end of file
@@ -6,19 +6,38 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Transaction
-from .serializers import TransactionSerializer
+from django.db import transaction as db_transaction
+from .models import Transaction, MonthlyRollup, Report
+from . import ledger
+from .serializers import TransactionSerializer, serialize_transactions
+from .filters import filter_transactions
+from .pagination import paginate_transactions
+from .aggregation import summarize, render_report
+from .importer import get_batch_size, import_transactions
+from .export import CONTENT_TYPES, STREAMERS
+from .batch import apply_batch
+from .budgets import budget_status
+from .cache import cached_per_user
+from django.http import StreamingHttpResponse
+import csv
 from django.shortcuts import get_object_or_404
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@cached_per_user('transactions')
 def transactions_view(request):
     user = request.user
 
     if request.method == 'GET':
-        transactions = Transaction.objects.filter(user=user).order_by('-date')
-        serializer = TransactionSerializer(transactions, many=True)
-        return Response(serializer.data)
+        params = request.query_params
+        transactions = filter_transactions(Transaction.objects.filter(user=user), params)
+
+        # Paginated mode is opt-in so existing callers keep getting a plain list
+        if 'cursor' in params or 'page_size' in params:
+            rows, next_cursor = paginate_transactions(transactions, params)
+            return Response({'results': rows, 'next': next_cursor})
+
+        return Response(serialize_transactions(transactions.order_by('-date')))
 
     elif request.method == 'POST':
         data = request.data.copy()
@@ -38,7 +57,9 @@ def transactions_view(request):
 def delete_transaction(request, transaction_id):
     from django.shortcuts import get_object_or_404
     transaction = get_object_or_404(Transaction, id=transaction_id, user=request.user)
-    transaction.delete()
+    with db_transaction.atomic():
+        transaction.delete()
+        ledger.record_changes(request.user.id, removed=[transaction])
     return Response({'message': 'Transaction deleted'}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -55,3 +76,88 @@ def update_transaction(request, transaction_id):
         return Response(serializer.data)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_per_user('summary')
+def transactions_summary(request):
+    """
+    GET /finance/summary/?period=monthly&buckets=12&type=expense
+    Returns trend buckets, per-category totals and week/month/year totals.
+    """
+    transactions = Transaction.objects.filter(user=request.user)
+    monthly = MonthlyRollup.objects.filter(user=request.user)
+    return Response(summarize(transactions, monthly, request.query_params))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_per_user('report')
+def report_data(request, report_id):
+    report = get_object_or_404(Report, id=report_id, user=request.user)
+    monthly = MonthlyRollup.objects.filter(user=request.user)
+    return Response(render_report(report, Transaction.objects.filter(user=request.user), monthly))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_transactions_view(request):
+    """
+    POST /finance/transactions/import/ multipart/form-data:
+      - file: CSV with Date, Description, Amount, Type, Category columns
+    Optional ?batch_size= controls how many rows go into each INSERT.
+    """
+    uploaded_file = request.FILES.get('file')
+    if not uploaded_file:
+        return Response({'error': 'No CSV file provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+    batch_size = get_batch_size(request.query_params)
+    try:
+        result = import_transactions(request.user, uploaded_file, batch_size)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return Response({'error': f'Failed to parse CSV: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_transactions(request):
+    """
+    GET /finance/transactions/export/?output=csv|ndjson
+    Streams the user's transactions; accepts the same filters as the listing.
+    """
+    output = request.query_params.get('output', 'csv')
+    if output not in STREAMERS:
+        return Response({'output': f"Invalid output: {output}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    transactions = filter_transactions(Transaction.objects.filter(user=request.user), request.query_params)
+    response = StreamingHttpResponse(STREAMERS[output](transactions), content_type=CONTENT_TYPES[output])
+    response['Content-Disposition'] = f'attachment; filename="transactions.{output}"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_transactions(request):
+    """
+    POST /finance/transactions/batch/ with JSON
+      { operations: [{op: "create", data: {...}},
+                     {op: "update", id: "...", data: {...}},
+                     {op: "delete", id: "..."}] }
+    Returns one result per operation, in order.
+    """
+    results = apply_batch(request.user, request.data.get('operations'))
+    return Response({'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def budgets_status(request):
+    """
+    GET /finance/budgets/status/
+    Spent, remaining and percent used for each active budget; budget_status
+    caches the result per user.
+    """
+    return Response(budget_status(request.user.id))
@@ -0,0 +1,47 @@
+import instance from './axios';
+
+// POST to an endpoint that answers with Server-Sent Events and call onEvent
+// for every `event:`/`data:` pair as it arrives. Abort through `signal`.
+export async function postEventStream(path, body, { onEvent, signal } = {}) {
+  const headers = {};
+  const token = localStorage.getItem('access_token');
+  if (token) headers.Authorization = `Bearer ${token}`;
+  if (!(body instanceof FormData)) {
+    headers['Content-Type'] = 'application/json';
+    body = JSON.stringify(body);
+  }
+
+  const res = await fetch(`${instance.defaults.baseURL}${path}`, {
+    method: 'POST',
+    headers,
+    body,
+    signal,
+  });
+  if (!res.ok || !res.body) {
+    throw new Error(`Request failed with status ${res.status}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      block.split('\n').forEach(line => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      });
+      if (data) onEvent?.(event, JSON.parse(data));
+    }
+  }
+}
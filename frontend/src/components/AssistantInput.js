@@ -1,6 +1,6 @@
 import React, { useState } from 'react';
 
-export default function AssistantInput({ onSend, loading }) {
+export default function AssistantInput({ onSend, onStop, loading }) {
   const [text, setText] = useState('');
   const [file, setFile] = useState(null);
 
@@ -42,13 +42,22 @@ export default function AssistantInput({ onSend, loading }) {
         />
       </label>
 
-      <button
-        type="submit"
-        className="text-sm px-5 py-2 rounded-md bg-cyan-500 hover:bg-cyan-400 transition disabled:opacity-50 text-white"
-        disabled={loading}
-      >
-        {loading ? '…' : 'Send'}
-      </button>
+      {loading ? (
+        <button
+          type="button"
+          onClick={onStop}
+          className="text-sm px-5 py-2 rounded-md bg-gray-600 hover:bg-gray-500 transition text-white"
+        >
+          Stop
+        </button>
+      ) : (
+        <button
+          type="submit"
+          className="text-sm px-5 py-2 rounded-md bg-cyan-500 hover:bg-cyan-400 transition disabled:opacity-50 text-white"
+        >
+          Send
+        </button>
+      )}
     </form>
   );
 }
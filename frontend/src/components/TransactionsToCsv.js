@@ -1,35 +1,26 @@
 import React, { useState } from "react";
+import axios from "../api/axios";
 
-const TransactionsToCsv = ({ transactions }) => {
-  const exportCSV = (filterType) => {
-    const headers = ["Date", "Time", "Transaction ID", "Description", "Amount", "Type", "Category"];
+const TransactionsToCsv = () => {
+  const exportCSV = async (filterType) => {
+    try {
+      const params = { output: "csv" };
+      if (filterType !== "all") params.type = filterType;
 
-    const filtered = transactions.filter(txn => {
-      if (filterType === "all") return true;
-      return txn.type === filterType;
-    });
+      const response = await axios.get("/finance/transactions/export/", {
+        params,
+        responseType: "blob",
+      });
 
-    const rows = filtered.map(txn => [
-      txn.date,
-      txn.time,
-      txn.id,
-      txn.description,
-      txn.amount.toFixed(2),
-      txn.type,
-      txn.category
-    ]);
-
-    const csvContent = [
-      headers.join(","),
-      ...rows.map(row => row.map(val => `"${val}"`).join(","))
-    ].join("\n");
-
-    const blob = new Blob([csvContent], { type: "text/csv;charset=utf-8;" });
-    const url = URL.createObjectURL(blob);
-    const link = document.createElement("a");
-    link.href = url;
-    link.download = `${filterType}_transactions.csv`;
-    link.click();
+      const url = URL.createObjectURL(response.data);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = `${filterType}_transactions.csv`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error("Failed to export transactions:", error);
+    }
   };
 
   const [open, setOpen] = useState(false);
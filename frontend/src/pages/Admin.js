@@ -14,77 +14,49 @@ import { motion } from "framer-motion";
 
 export default function Admin() {
   const [users, setUsers] = useState([]);
-  const [searchId, setSearchId] = useState("");
-
-  const [thisYear, setThisYear]   = useState(0);
-  const [lastYear, setLastYear]   = useState(0);
-  const [thisMonth, setThisMonth] = useState(0);
-  const [lastMonth, setLastMonth] = useState(0);
-  const [thisWeek, setThisWeek]   = useState(0);
-  const [lastWeek, setLastWeek]   = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [search, setSearch] = useState("");
+  const [stats, setStats] = useState(null);
+
+  const loadUsers = (cursor = null) => {
+    const params = { search: search.trim() || undefined, cursor: cursor || undefined };
+    return axios
+      .get("/users/admin/users/", { params })
+      .then((res) => {
+        setUsers((prev) => (cursor ? [...prev, ...res.data.results] : res.data.results));
+        setNextCursor(res.data.next_cursor);
+      })
+      .catch((err) => console.error("Failed to load users", err));
+  };
 
-  const [monthlyData, setMonthlyData] = useState([]);
+  useEffect(() => {
+    const timer = setTimeout(() => loadUsers(), 300);
+    return () => clearTimeout(timer);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [search]);
 
   useEffect(() => {
     axios
-      .get("/users/admin/users/")
-      .then((res) => setUsers(res.data))
-      .catch((err) => console.error("Failed to load users", err));
+      .get("/users/admin/users/stats/")
+      .then((res) => setStats(res.data))
+      .catch((err) => console.error("Failed to load user stats", err));
   }, []);
 
-  useEffect(() => {
-    const now = new Date();
-    const startOfYear      = new Date(now.getFullYear(), 0, 1);
-    const startOfLastYear  = new Date(now.getFullYear() - 1, 0, 1);
-    const endOfLastYear    = new Date(now.getFullYear(), 0, 0);
-
-    const startOfMonth     = new Date(now.getFullYear(), now.getMonth(), 1);
-    const startOfLastMonth = new Date(now.getFullYear(), now.getMonth() - 1, 1);
-    const endOfLastMonth   = new Date(now.getFullYear(), now.getMonth(), 0);
-
-    const startOfWeek      = new Date(now);
-    startOfWeek.setDate(now.getDate() - now.getDay());
-    const startOfLastWeek  = new Date(startOfWeek);
-    startOfLastWeek.setDate(startOfLastWeek.getDate() - 7);
-    const endOfLastWeek    = new Date(startOfWeek);
-    endOfLastWeek.setDate(endOfLastWeek.getDate() - 1);
-
-    let ty = 0, ly = 0, tm = 0, lm = 0, tw = 0, lw = 0;
-    const monthlyCounts = Array(12).fill(0);
-
-    users.forEach((u) => {
-      const c = new Date(u.created_at);
-      if (c >= startOfYear) {
-        ty++;
-        if (c.getFullYear() === now.getFullYear()) {
-          monthlyCounts[c.getMonth()]++;
-        }
-      } else if (c >= startOfLastYear && c <= endOfLastYear) {
-        ly++;
-      }
+  const thisYear  = stats?.this_year  ?? 0;
+  const lastYear  = stats?.last_year  ?? 0;
+  const thisMonth = stats?.this_month ?? 0;
+  const lastMonth = stats?.last_month ?? 0;
+  const thisWeek  = stats?.this_week  ?? 0;
+  const lastWeek  = stats?.last_week  ?? 0;
 
-      if (c >= startOfMonth) tm++;
-      else if (c >= startOfLastMonth && c <= endOfLastMonth) lm++;
-
-      if (c >= startOfWeek) tw++;
-      else if (c >= startOfLastWeek && c <= endOfLastWeek) lw++;
-    });
-
-    setThisYear(ty);
-    setLastYear(ly);
-    setThisMonth(tm);
-    setLastMonth(lm);
-    setThisWeek(tw);
-    setLastWeek(lw);
-
-    const monthLabels = [
-      "Jan", "Feb", "Mar", "Apr", "May", "Jun",
-      "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"
-    ];
-    setMonthlyData(
-      monthLabels.map((m, idx) => ({ month: m, count: monthlyCounts[idx] }))
-    );
-  }, [users]);
+  const monthLabels = [
+    "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+    "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"
+  ];
+  const monthlyData = monthLabels.map((m, idx) => ({
+    month: m,
+    count: stats ? stats.monthly[idx] : 0,
+  }));
 
   const getChange = (current, previous) => {
     if (previous === 0) return { percent: 100, direction: "up" };
@@ -129,10 +101,6 @@ export default function Admin() {
     }
   };
 
-  const filteredUsers = users.filter((u) =>
-    u.id.toLowerCase().includes(searchId.toLowerCase())
-  );
-
   return (
     <div className="p-6 bg-gray-50 min-h-screen">
       <h2 className="text-2xl font-bold mb-6 text-gray-800">Manage Users</h2>
@@ -185,10 +153,10 @@ export default function Admin() {
           </svg>
           <input
             type="text"
-            placeholder="Search ID"
+            placeholder="Search email, username or ID"
             className="outline-none text-sm ml-3 w-48"
-            value={searchId}
-            onChange={(e) => setSearchId(e.target.value)}
+            value={search}
+            onChange={(e) => setSearch(e.target.value)}
           />
         </div>
       </div>
@@ -210,7 +178,7 @@ export default function Admin() {
         </div>
         {/* Body */}
         <div className="min-w-[1100px]">
-          {filteredUsers.map((u) => (
+          {users.map((u) => (
             <div
               key={u.id}
               className="grid grid-cols-[1rem_180px_180px_180px_200px_100px_80px_80px] gap-x-20 items-center bg-white px-8 py-4 text-sm text-center border-t"
@@ -230,6 +198,16 @@ export default function Admin() {
             </div>
           ))}
         </div>
+        {nextCursor && (
+          <div className="flex justify-center mt-4">
+            <button
+              onClick={() => loadUsers(nextCursor)}
+              className="px-4 py-2 text-sm rounded bg-white border hover:bg-gray-100"
+            >
+              Load more
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Monthly Sign-up Chart */}
@@ -1,16 +1,21 @@
 import React, { useContext, useState, useEffect, useRef } from 'react';
 import ReactMarkdown from 'react-markdown';
 import { AuthContext } from '../context/AuthContext';
-import axios from '../api/axios';
+import { postEventStream } from '../api/stream';
 import AssistantInput from '../components/AssistantInput';
 
 export default function Assistant() {
   const { auth } = useContext(AuthContext);
   const [messages, setMessages] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [streaming, setStreaming] = useState(false);
   const messagesEndRef = useRef(null);
+  const abortRef = useRef(null);
+  // Server-side thread for signed-in users; null starts a new one
+  const conversationRef = useRef(null);
 
   useEffect(() => {
+    conversationRef.current = null;
     setMessages([
       {
         sender: 'bot',
@@ -23,6 +28,13 @@ export default function Assistant() {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   }, [messages]);
 
+  const appendToReply = chunk => {
+    setMessages(ms => {
+      const last = ms[ms.length - 1];
+      return [...ms.slice(0, -1), { ...last, text: last.text + chunk }];
+    });
+  };
+
   const handleSend = async ({ text, file }) => {
     if (file) {
       setMessages(ms => [...ms, { sender: 'user', text: `Uploaded: **${file.name}**` }]);
@@ -31,34 +43,62 @@ export default function Assistant() {
       setMessages(ms => [...ms, { sender: 'user', text }]);
     }
 
+    const controller = new AbortController();
+    abortRef.current = controller;
+    let started = false;
     setLoading(true);
+    setStreaming(false);
     try {
-      let res;
+      let path, body;
       if (file) {
-        const formData = new FormData();
-        formData.append('file', file);
-        if (text) formData.append('message', text);
-        res = await axios.post('/assistant/csv/', formData, {
-          headers: { 'Content-Type': 'multipart/form-data' }
-        });
+        body = new FormData();
+        body.append('file', file);
+        if (text) body.append('message', text);
+        path = '/assistant/csv/?stream=1';
       } else {
-        res = await axios.post('/assistant/', { message: text });
+        body = { message: text };
+        if (auth) body.conversation = conversationRef.current;
+        path = '/assistant/?stream=1';
       }
-      setMessages(ms => [...ms, { sender: 'bot', text: res.data.response }]);
-    } catch (err) {
-      console.error('Chatbot error:', err);
-      setMessages(ms => [
-        ...ms,
-        {
-          sender: 'bot',
-          text: '😞 Oops! Emmanuel is having a hard time responding. Please try again later.'
+
+      await postEventStream(path, body, {
+        signal: controller.signal,
+        onEvent: (event, data) => {
+          if (event === 'token') {
+            if (!started) {
+              started = true;
+              setStreaming(true);
+              setMessages(ms => [...ms, { sender: 'bot', text: data.text }]);
+            } else {
+              appendToReply(data.text);
+            }
+          } else if (event === 'done' && data.conversation) {
+            conversationRef.current = data.conversation;
+          } else if (event === 'error') {
+            throw new Error(data.error);
+          }
         }
-      ]);
+      });
+    } catch (err) {
+      if (err.name !== 'AbortError') {
+        console.error('Chatbot error:', err);
+        setMessages(ms => [
+          ...ms,
+          {
+            sender: 'bot',
+            text: '😞 Oops! Emmanuel is having a hard time responding. Please try again later.'
+          }
+        ]);
+      }
     } finally {
+      abortRef.current = null;
       setLoading(false);
+      setStreaming(false);
     }
   };
 
+  const handleStop = () => abortRef.current?.abort();
+
   return (
     <div className="flex justify-center items-center bg-[#e4e6e7] min-h-[calc(100vh-4rem)] overflow-hidden">
       <div className="w-full max-w-7xl h-[80vh] bg-[#1e1e1e] text-white rounded-2xl shadow-xl flex flex-col">
@@ -87,7 +127,7 @@ export default function Assistant() {
               </div>
             </div>
           ))}
-          {loading && (
+          {loading && !streaming && (
             <div className="flex items-start gap-3 justify-start">
               <div className="w-8 h-8 bg-cyan-600 text-white rounded-full flex items-center justify-center text-sm font-bold">
                 E
@@ -101,7 +141,7 @@ export default function Assistant() {
         </div>
 
         {/* Extracted Input + CSV */}
-        <AssistantInput onSend={handleSend} loading={loading} />
+        <AssistantInput onSend={handleSend} onStop={handleStop} loading={loading} />
       </div>
     </div>
   );
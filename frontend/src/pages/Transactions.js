@@ -133,7 +133,7 @@ const TransactionsPage = () => {
           </div>
 
           <div className="flex items-center gap-4">
-          <TransactionsToCsv transactions={sortedTransactions} />
+          <TransactionsToCsv />
 
           {/* Add Transaction button */}
           <button
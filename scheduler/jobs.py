@@ -1,15 +1,49 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from django_apscheduler.jobstores import DjangoJobStore
-from django.utils import timezone
-from datetime import timedelta
-from users.models import CustomUser
+from users.cleanup import delete_expired_guests
+from users.guest_pool import refill_pool
+from asgiref.sync import async_to_sync
+from assistant import llm
+from assistant.cache import purge_expired as purge_expired_responses
+from assistant.threads import compact_pending
+from finance.recurrence import materialize_due_occurrences
+from finance.ledger import reconcile_balances
+from users.blacklist import purge_expired_tokens
 
 def delete_old_guests():
-    cutoff = timezone.now() - timedelta(days=3)
-    expired = CustomUser.objects.filter(is_guest=True, created_at__lt=cutoff)
-    count = expired.count()
-    expired.delete()
-    print(f"[APS] Deleted {count} guest users")
+    deleted, recycled, removed, finished = delete_expired_guests()
+    for table, rows in sorted(removed.items()):
+        print(f"[APS] Guest cleanup removed {rows} rows from {table}")
+    suffix = "" if finished else ", time budget reached"
+    print(f"[APS] Deleted {deleted} guest users, recycled {recycled} into the pool{suffix}")
+
+def refill_guest_pool():
+    added = refill_pool()
+    if added:
+        print(f"[APS] Added {added} guests to the pool")
+
+def materialize_recurring_transactions():
+    created = materialize_due_occurrences()
+    print(f"[APS] Materialized {created} recurring transactions")
+
+def reconcile_user_balances():
+    drift = reconcile_balances()
+    for user_id, (stored, expected) in drift.items():
+        print(f"[APS] Balance drift for {user_id}: stored {stored}, expected {expected}")
+    print(f"[APS] Reconciled balances, {len(drift)} users drifted")
+
+def purge_expired_refresh_tokens():
+    outstanding, blacklisted = purge_expired_tokens()
+    print(f"[APS] Purged {outstanding} expired outstanding tokens, {blacklisted} blacklisted")
+
+def purge_assistant_cache():
+    deleted = purge_expired_responses()
+    print(f"[APS] Purged {deleted} expired assistant responses")
+
+def compact_conversations():
+    compacted, failed = compact_pending(async_to_sync(llm.complete))
+    if compacted or failed:
+        print(f"[APS] Compacted {compacted} assistant conversations, {failed} failed")
 
 scheduler = BackgroundScheduler()
 scheduler.add_jobstore(DjangoJobStore(), "default")
@@ -20,4 +54,58 @@ scheduler.add_job(
     name="delete_expired_guest_accounts",
     jobstore="default",
 )
+scheduler.add_job(
+    materialize_recurring_transactions,
+    "cron",
+    minute=5,
+    id="materialize_recurring_transactions",
+    name="materialize_recurring_transactions",
+    jobstore="default",
+    replace_existing=True,
+)
+scheduler.add_job(
+    reconcile_user_balances,
+    "cron",
+    hour=3, minute=0,
+    id="reconcile_user_balances",
+    name="reconcile_user_balances",
+    jobstore="default",
+    replace_existing=True,
+)
+scheduler.add_job(
+    purge_expired_refresh_tokens,
+    "cron",
+    hour=4, minute=0,
+    id="purge_expired_refresh_tokens",
+    name="purge_expired_refresh_tokens",
+    jobstore="default",
+    replace_existing=True,
+)
+scheduler.add_job(
+    refill_guest_pool,
+    "interval",
+    minutes=1,
+    id="refill_guest_pool",
+    name="refill_guest_pool",
+    jobstore="default",
+    replace_existing=True,
+)
+scheduler.add_job(
+    purge_assistant_cache,
+    "cron",
+    hour=4, minute=30,
+    id="purge_assistant_cache",
+    name="purge_assistant_cache",
+    jobstore="default",
+    replace_existing=True,
+)
+scheduler.add_job(
+    compact_conversations,
+    "interval",
+    minutes=1,
+    id="compact_conversations",
+    name="compact_conversations",
+    jobstore="default",
+    replace_existing=True,
+)
 scheduler.start()
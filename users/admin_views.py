@@ -3,17 +3,26 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
 
+from rest_framework.permissions import IsAdminUser
+
+from .listing import filter_users, listed_users, paginate_users
 from .models import CustomUser
-from .serializers import UserSerializer
-from .permissions import IsStaffUser
+from .serializers import AdminUserSerializer, UserSerializer
 
 class UserAdminList(generics.ListAPIView):
     """
-    GET /users/admin/ → list all users
+    GET /users/admin/ → list users, newest first, one keyset page at a time
     """
-    queryset = CustomUser.objects.all().order_by('created_at')
-    serializer_class = UserSerializer
-    permission_classes = [IsStaffUser]  
+    serializer_class = AdminUserSerializer
+    permission_classes = [IsAdminUser]
+
+    def list(self, request, *args, **kwargs):
+        users = filter_users(listed_users(), request.query_params)
+        page, next_cursor = paginate_users(users, request.query_params)
+        return Response({
+            'results': self.get_serializer(page, many=True).data,
+            'next_cursor': next_cursor,
+        })
 
 class UserAdminDetail(generics.DestroyAPIView):
     """
@@ -21,7 +30,7 @@ class UserAdminDetail(generics.DestroyAPIView):
     """
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
-    permission_classes = [IsStaffUser]
+    permission_classes = [IsAdminUser]
 
     def perform_destroy(self, instance):
         instance.is_active = False
@@ -1,9 +1,16 @@
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+
+def add_user_claims(token, user):
+    """Embed the flags UnifiedJWTAuthentication needs to build a user without a query."""
+    token["is_staff"] = user.is_staff
+    token["is_guest"] = user.is_guest
+    return token
+
 class GuestTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
-        token = super().get_token(user)
+        token = add_user_claims(super().get_token(user), user)
         token["is_guest"] = True
         return token
 
@@ -15,8 +22,7 @@ class GuestTokenObtainPairSerializer(TokenObtainPairSerializer):
 class AdminTokenObtainPairSerializer(TokenObtainPairSerializer):  
     @classmethod
     def get_token(cls, user):
-        token = super().get_token(user)
-        token["is_staff"] = user.is_staff
+        token = add_user_claims(super().get_token(user), user)
         if user.is_staff:
             token["is_admin"] = True
         return token
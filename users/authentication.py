@@ -1,22 +1,80 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken
-from datetime import timedelta
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow
 from django.conf import settings
+from django.core.cache import cache
+from .models import ClaimsUser
+
+USER_CACHE_KEY = 'auth:user:{jti}'
+
+
+def check_guest_age(token):
+    if token.get("is_guest"):
+        issued_at = token.payload.get("iat")
+        now = int(aware_utcnow().timestamp())
+        age = now - issued_at
+        if age > settings.SIMPLE_JWT["GUEST_REFRESH_TOKEN_LIFETIME"].total_seconds():
+            raise InvalidToken("Guest token expired")
+
 
 class GuestAwareJWTAuthentication(JWTAuthentication):
     def get_validated_token(self, raw_token):
         token = super().get_validated_token(raw_token)
-        if token.get("is_guest"):
-            issued_at = token.payload.get("iat")
-            now = int(self.get_validated_token_clock().timestamp())
-            age = now - issued_at
-            if age > settings.SIMPLE_JWT["GUEST_REFRESH_TOKEN_LIFETIME"].total_seconds():
-                raise InvalidToken("Guest token expired")
+        check_guest_age(token)
         return token
 
-class AdminAwareJWTAuthentication(JWTAuthentication):  
+class AdminAwareJWTAuthentication(JWTAuthentication):
     def get_validated_token(self, raw_token):
         token = super().get_validated_token(raw_token)
         if not token.get("is_admin"):
             raise InvalidToken("Token is not an admin token")
-        return token
\ No newline at end of file
+        return token
+
+
+class UnifiedJWTAuthentication(JWTAuthentication):
+    """
+    Verifies the token signature once and applies the guest-age and admin
+    claim rules to the decoded payload, instead of stacking one
+    authenticator per rule. The user row is cached per token jti for
+    JWT_USER_CACHE_TTL seconds, so repeat requests skip the user query.
+
+    With JWT_STATELESS_USER enabled, tokens carrying is_staff and is_guest
+    claims get a ClaimsUser instead and no query is made unless the view
+    reads other user fields. Deactivated users keep access until their
+    token expires in that mode.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        check_guest_age(token)
+        return token
+
+    def get_user(self, validated_token):
+        if getattr(settings, 'JWT_STATELESS_USER', False) and "is_staff" in validated_token and "is_guest" in validated_token:
+            user = self.get_claims_user(validated_token)
+        else:
+            user = self.get_cached_user(validated_token)
+
+        if validated_token.get("is_admin") and not user.is_staff:
+            raise InvalidToken("Admin claim does not match the user")
+        return user
+
+    def get_claims_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return ClaimsUser.from_claims(user_id, bool(validated_token["is_staff"]), bool(validated_token["is_guest"]))
+
+    def get_cached_user(self, validated_token):
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        ttl = getattr(settings, 'JWT_USER_CACHE_TTL', 30)
+        key = USER_CACHE_KEY.format(jti=jti)
+
+        user = cache.get(key) if jti and ttl else None
+        if user is None:
+            user = super().get_user(validated_token)
+            if jti and ttl:
+                cache.set(key, user, ttl)
+        return user
@@ -0,0 +1,183 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Rows blacklisted shortly before the last load may commit after it
+RELOAD_OVERLAP = timedelta(minutes=1)
+# Expired jtis only drop out of the filter on a full rebuild
+FULL_REBUILD_INTERVAL = 3600
+PURGE_CHUNK_SIZE = 1000
+
+
+class BloomFilter:
+    """Set membership with false positives but no false negatives."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big')
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        added = False
+        for position in self._positions(value):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        # Re-adding a value sets no new bits, so it doesn't count towards capacity
+        if added:
+            self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class BlacklistFilter:
+    """
+    In-process Bloom filter over the jtis of unexpired blacklisted tokens.
+    A miss means the token is certainly not blacklisted and the DB check can
+    be skipped; a hit falls through to the DB. Rows blacklisted by other
+    processes are picked up incrementally every ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl=None, capacity=None):
+        self._ttl = ttl
+        self._capacity = capacity
+        self._bloom = None
+        self._built_at = 0.0
+        self._loaded_at = 0.0
+        self._watermark = None
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'TOKEN_BLACKLIST_FILTER_TTL', 5)
+
+    @property
+    def capacity(self):
+        if self._capacity is not None:
+            return self._capacity
+        return getattr(settings, 'TOKEN_BLACKLIST_FILTER_CAPACITY', 100000)
+
+    def invalidate(self):
+        with self._lock:
+            self._bloom = None
+
+    def _jtis(self, now, since=None):
+        rows = BlacklistedToken.objects.filter(token__expires_at__gt=now)
+        if since is not None:
+            rows = rows.filter(blacklisted_at__gte=since - RELOAD_OVERLAP)
+        return rows.values_list('token__jti', flat=True).iterator(chunk_size=PURGE_CHUNK_SIZE)
+
+    def _rebuild(self):
+        now = timezone.now()
+        jtis = list(self._jtis(now))
+        # Twice the live rows, so the next forced rebuild is only once they have doubled
+        self._bloom = BloomFilter(max(self.capacity, 2 * len(jtis)))
+        for jti in jtis:
+            self._bloom.add(jti)
+        self._watermark = now
+        self._built_at = self._loaded_at = time.monotonic()
+
+    def _reload(self):
+        now = timezone.now()
+        for jti in self._jtis(now, since=self._watermark):
+            self._bloom.add(jti)
+        self._watermark = now
+        self._loaded_at = time.monotonic()
+
+    def _refresh(self):
+        age = time.monotonic() - self._built_at
+        if self._bloom is None or age >= FULL_REBUILD_INTERVAL or self._bloom.count > self._bloom.capacity:
+            self._rebuild()
+        elif time.monotonic() - self._loaded_at >= self.ttl:
+            self._reload()
+
+    def might_contain(self, jti):
+        with self._lock:
+            self._refresh()
+            return jti in self._bloom
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken that only queries the blacklist when the filter can't rule the jti out."""
+
+    def check_blacklist(self):
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+
+def blacklist(token):
+    """
+    Blacklist ``token``, failing if it already was. The OneToOne on
+    BlacklistedToken makes this the authoritative replay check even when
+    the filter in this process is behind.
+    """
+    jti = token.payload[api_settings.JTI_CLAIM]
+    outstanding, _created = token.outstand()
+    _blacklisted, created = BlacklistedToken.objects.get_or_create(token=outstanding)
+    if not created:
+        raise TokenError(_("Token is blacklisted"))
+    db_transaction.on_commit(lambda: blacklist_filter.add(jti))
+
+
+def rotate(refresh):
+    """Blacklist ``refresh`` if configured and turn it into a fresh outstanding token."""
+    with db_transaction.atomic():
+        if api_settings.BLACKLIST_AFTER_ROTATION:
+            blacklist(refresh)
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        refresh.outstand()
+    return refresh
+
+
+def purge_expired_tokens(chunk_size=PURGE_CHUNK_SIZE, now=None):
+    """
+    Delete expired outstanding tokens and their blacklist rows, oldest
+    first, ``chunk_size`` at a time so no statement holds locks for long.
+    Returns (outstanding deleted, blacklisted deleted).
+    """
+    now = now or timezone.now()
+    outstanding_deleted = blacklisted_deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=now)
+            .order_by('expires_at')
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        with db_transaction.atomic():
+            blacklisted_deleted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            outstanding_deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+    return outstanding_deleted, blacklisted_deleted
@@ -0,0 +1,142 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, models
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .guest_pool import new_guest, pool_size, pooled_guests
+from .models import CustomUser
+
+
+def _label(model):
+    return model._meta.label
+
+
+def _collect(model, queryset, deletes, updates, seen=()):
+    """
+    Walk the reverse relations of ``model`` and queue raw deletes for CASCADE
+    children (deepest first) and NULL updates for SET_NULL ones, each
+    filtered by a subquery on ``queryset`` instead of loading any rows.
+    """
+    seen = seen + (model,)
+    pks = queryset.values('pk')
+    for relation in model._meta.related_objects:
+        related = relation.related_model
+        field = relation.field
+        if relation.many_to_many:
+            continue
+        children = related._base_manager.filter(**{f"{field.name}__in": pks})
+        if relation.on_delete is models.CASCADE:
+            if related not in seen:
+                _collect(related, children, deletes, updates, seen)
+                deletes.append((related, children))
+        elif relation.on_delete is models.SET_NULL:
+            updates.append((related, children, field.name))
+
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        deletes.append((through, through._base_manager.filter(**{f"{field.m2m_field_name()}__in": pks})))
+
+
+def _delete_rows(model, queryset):
+    """
+    Delete the rows of ``queryset`` with DELETE ... WHERE pk IN (subquery),
+    at most GUEST_CLEANUP_ROW_CHUNK rows per statement, so no ids are loaded
+    into Python and no single statement grows with the data. Unlike
+    QuerySet.delete() nothing is collected and no signals are sent.
+    """
+    chunk = getattr(settings, 'GUEST_CLEANUP_ROW_CHUNK', 5000)
+    connection = connections[queryset.db]
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    subquery, params = queryset.values('pk')[:chunk].query.sql_with_params()
+    deleted = 0
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({subquery})", params)
+            deleted += cursor.rowcount
+            if cursor.rowcount < chunk:
+                return deleted
+
+
+def _purge_dependents(users):
+    removed = Counter()
+    deletes, updates = [], []
+    _collect(CustomUser, users, deletes, updates)
+    for model, queryset, field_name in updates:
+        removed[_label(model)] += queryset.update(**{field_name: None})
+    for model, queryset in deletes:
+        removed[_label(model)] += _delete_rows(model, queryset)
+    return removed
+
+
+def delete_users(user_ids):
+    """
+    Delete the given users and everything that cascades from them with
+    DELETE statements filtered by subqueries on the user ids, in chunks of
+    GUEST_CLEANUP_ROW_CHUNK rows. No rows are loaded and no signals are sent.
+    Returns a Counter of rows removed (or nulled) per model label.
+    """
+    users = CustomUser._base_manager.filter(id__in=user_ids)
+    with db_transaction.atomic():
+        removed = _purge_dependents(users)
+        removed[_label(CustomUser)] += _delete_rows(CustomUser, users)
+    return removed
+
+
+def recycle_guests(user_ids):
+    """
+    Delete the given guests and refill their slots in the guest pool in the
+    same transaction. The replacements are fresh rows with new ids, so
+    tokens issued to a previous guest can't reach the next one.
+    """
+    with db_transaction.atomic():
+        removed = delete_users(user_ids)
+        CustomUser.objects.bulk_create([new_guest(pooled=True) for _ in user_ids])
+    return removed
+
+
+def delete_expired_guests(now=None, batch_size=None, time_budget=None, pause=None):
+    """
+    Remove guests older than GUEST_REFRESH_TOKEN_LIFETIME in id-ordered
+    batches, sleeping ``pause`` seconds between batches and stopping once
+    ``time_budget`` seconds have passed. Whatever is left is picked up by the
+    next run. While the guest pool is below GUEST_POOL_SIZE, expired guests
+    are recycled into it instead of deleted.
+    Returns (guests deleted, guests recycled, Counter of rows per table, finished).
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(settings, 'GUEST_CLEANUP_BATCH_SIZE', 200)
+    time_budget = time_budget if time_budget is not None else getattr(settings, 'GUEST_CLEANUP_TIME_BUDGET', 60)
+    pause = pause if pause is not None else getattr(settings, 'GUEST_CLEANUP_PAUSE', 0.5)
+    cutoff = now - settings.SIMPLE_JWT.get('GUEST_REFRESH_TOKEN_LIFETIME', timedelta(days=3))
+
+    expired = CustomUser.objects.filter(is_guest=True, in_guest_pool=False, created_at__lt=cutoff).order_by('id')
+    deadline = time.monotonic() + time_budget
+    removed = Counter()
+    deleted = recycled = 0
+    last_id = None
+
+    while True:
+        batch = expired if last_id is None else expired.filter(id__gt=last_id)
+        ids = list(batch.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted, recycled, removed, True
+        last_id = ids[-1]
+
+        open_slots = max(0, pool_size() - pooled_guests().count())
+        if open_slots:
+            removed.update(recycle_guests(ids[:open_slots]))
+            recycled += len(ids[:open_slots])
+        if ids[open_slots:]:
+            removed.update(delete_users(ids[open_slots:]))
+            deleted += len(ids[open_slots:])
+
+        if len(ids) < batch_size:
+            return deleted, recycled, removed, True
+        if time.monotonic() + pause >= deadline:
+            return deleted, recycled, removed, False
+        time.sleep(pause)
@@ -0,0 +1,68 @@
+import random
+import string
+import uuid
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .models import CustomUser
+
+
+def random_suffix(n=6):
+    return ''.join(random.choices(string.ascii_letters + string.digits, k=n))
+
+
+def pool_size():
+    return getattr(settings, 'GUEST_POOL_SIZE', 50)
+
+
+def pooled_guests():
+    return CustomUser.objects.filter(is_guest=True, in_guest_pool=True)
+
+
+def new_guest(pooled=False):
+    user = CustomUser(
+        email=f"guest-{uuid.uuid4()}@neo.finance",
+        username=f"Guest{random_suffix()}",
+        is_guest=True,
+        in_guest_pool=pooled,
+    )
+    user.set_unusable_password()
+    return user
+
+
+def create_guest():
+    """Create a guest on the request path, used when the pool is empty."""
+    user = new_guest()
+    user.save()
+    return user
+
+
+def claim_guest():
+    """
+    Take one pooled guest, skipping rows other signups have locked, so
+    concurrent claims never wait on each other or get the same account.
+    The guest lifetime starts at the claim. Returns None if the pool is empty.
+    """
+    with db_transaction.atomic():
+        user = pooled_guests().select_for_update(skip_locked=True).order_by('id').first()
+        if user is None:
+            return None
+        user.in_guest_pool = False
+        user.created_at = timezone.now()
+        user.save(update_fields=['in_guest_pool', 'created_at'])
+    return user
+
+
+def refill_pool(target=None):
+    """Top the pool up to ``target`` guests. Returns how many were added."""
+    target = pool_size() if target is None else target
+    missing = target - pooled_guests().count()
+    if missing <= 0:
+        return 0
+    guests = [new_guest(pooled=True) for _ in range(missing)]
+    # A rare username collision just leaves the slot for the next run, so
+    # count the rows that made it in rather than the ones sent
+    CustomUser.objects.bulk_create(guests, ignore_conflicts=True)
+    return CustomUser.objects.filter(email__in=[guest.email for guest in guests]).count()
@@ -0,0 +1,128 @@
+import uuid
+from datetime import timedelta
+
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from finance.models import Transaction
+from finance.pagination import after_cursor, encode_cursor, get_page_size
+
+from .models import CustomUser
+
+MAX_PAGE_SIZE = 200
+
+BOOLEAN_FILTERS = ['is_guest', 'is_staff', 'is_active']
+TRUE_VALUES = {'true', '1', 'yes'}
+FALSE_VALUES = {'false', '0', 'no'}
+
+
+def listed_users():
+    """Every account except the unclaimed guests waiting in the guest pool."""
+    return CustomUser.objects.filter(in_guest_pool=False)
+
+
+def filter_users(queryset, params):
+    """
+    Apply the admin listing filters: is_guest/is_staff/is_active booleans and
+    ``search``, a case-insensitive prefix match on email or username (or an
+    exact id when it parses as a UUID).
+    """
+    for name in BOOLEAN_FILTERS:
+        value = params.get(name)
+        if value is None or value == '':
+            continue
+        if value.lower() in TRUE_VALUES:
+            queryset = queryset.filter(**{name: True})
+        elif value.lower() in FALSE_VALUES:
+            queryset = queryset.filter(**{name: False})
+        else:
+            raise ValidationError({name: "Must be true or false"})
+
+    search = params.get('search', '').strip()
+    if search:
+        try:
+            queryset = queryset.filter(id=uuid.UUID(search))
+        except ValueError:
+            queryset = queryset.filter(Q(email__istartswith=search) | Q(username__istartswith=search))
+    return queryset
+
+
+def with_transaction_counts(queryset):
+    # Correlated subquery instead of a JOIN + GROUP BY, so only the rows of
+    # the current page are counted
+    counts = (
+        Transaction.objects.filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    return queryset.annotate(
+        transaction_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+def paginate_users(queryset, params):
+    """
+    Keyset pagination on (created_at, id), newest first.
+    Returns (users, next_cursor).
+    """
+    page_size = get_page_size(params, MAX_PAGE_SIZE)
+    queryset = queryset.order_by('-created_at', '-id')
+
+    cursor = params.get('cursor')
+    if cursor:
+        queryset = after_cursor(queryset, 'created_at', cursor)
+
+    users = list(with_transaction_counts(queryset)[:page_size + 1])
+    next_cursor = None
+    if len(users) > page_size:
+        users = users[:page_size]
+        next_cursor = encode_cursor(users[-1].created_at.isoformat(), users[-1].id)
+    return users, next_cursor
+
+
+def signup_stats(queryset, now=None):
+    """
+    New-user counts for the admin cards (this/last year, month and week,
+    weeks starting on Sunday) and per month of the current year, in two
+    aggregate queries.
+    """
+    now = timezone.localtime(now)
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    year = day.replace(month=1, day=1)
+    last_year = year.replace(year=year.year - 1)
+    month = day.replace(day=1)
+    last_month = (month - timedelta(days=1)).replace(day=1)
+    week = day - timedelta(days=(day.weekday() + 1) % 7)
+    last_week = week - timedelta(days=7)
+
+    def between(start, end=None):
+        condition = Q(created_at__gte=start)
+        if end is not None:
+            condition &= Q(created_at__lt=end)
+        return Count('id', filter=condition)
+
+    stats = queryset.aggregate(
+        this_year=between(year),
+        last_year=between(last_year, year),
+        this_month=between(month),
+        last_month=between(last_month, month),
+        this_week=between(week),
+        last_week=between(last_week, week),
+    )
+
+    monthly = [0] * 12
+    rows = (
+        queryset.filter(created_at__gte=year)
+        .annotate(month=TruncMonth('created_at'))
+        .values('month')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        monthly[timezone.localtime(row['month']).month - 1] = row['count']
+    stats['monthly'] = monthly
+    return stats
@@ -0,0 +1,56 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.authentication import USER_CACHE_KEY
+from users.models import CustomUser
+
+STACKED = [
+    'rest_framework_simplejwt.authentication.JWTAuthentication',
+    'users.authentication.GuestAwareJWTAuthentication',
+    'users.authentication.AdminAwareJWTAuthentication',
+]
+
+class Command(BaseCommand):
+    help = 'Measure per-request authentication overhead of the stacked authenticators vs the configured ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Authenticated requests to simulate')
+
+    def handle(self, *args, **options):
+        configured = settings.REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES']
+        with db_transaction.atomic():
+            suffix = uuid.uuid4().hex[:8]
+            # An admin token, so whichever class is reached accepts it
+            user = CustomUser.objects.create(email=f"bench-{suffix}@neo.finance", username=f"bench-{suffix}", is_staff=True)
+            token = RefreshToken.for_user(user).access_token
+            token["is_admin"] = True
+            # Only the benchmark token's own entry is dropped; the default cache is shared
+            cache_key = USER_CACHE_KEY.format(jti=token[api_settings.JTI_CLAIM])
+            request = Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+
+            for label, paths in (('stacked', STACKED), ('configured', configured)):
+                cache.delete(cache_key)
+                authenticators = [import_string(path)() for path in paths]
+                elapsed = self.run(authenticators, request, options['requests'])
+                self.stdout.write(f"{label:>10}: {elapsed / options['requests'] * 1e6:8.1f} µs/request  ({', '.join(p.rsplit('.', 1)[1] for p in paths)})")
+            cache.delete(cache_key)
+            db_transaction.set_rollback(True)
+
+    def run(self, authenticators, request, count):
+        start = time.perf_counter()
+        for _ in range(count):
+            # Same as APIView.perform_authentication: the first class that
+            # returns a user wins and the rest are never asked
+            for authenticator in authenticators:
+                if authenticator.authenticate(request) is not None:
+                    break
+        return time.perf_counter() - start
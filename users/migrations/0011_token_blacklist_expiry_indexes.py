@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_claimsuser'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    # The token_blacklist tables belong to simplejwt, so their indexes are
+    # managed here: expires_at for the purge job and blacklisted_at for
+    # incremental reloads of users.blacklist.BlacklistFilter.
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS token_outstanding_expires_idx "
+                "ON token_blacklist_outstandingtoken (expires_at)",
+            reverse_sql="DROP INDEX IF EXISTS token_outstanding_expires_idx",
+        ),
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS token_blacklisted_at_idx "
+                "ON token_blacklist_blacklistedtoken (blacklisted_at)",
+            reverse_sql="DROP INDEX IF EXISTS token_blacklisted_at_idx",
+        ),
+    ]
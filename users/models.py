@@ -1,6 +1,8 @@
 import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.contrib.postgres.indexes import OpClass
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 class CustomUserManager(BaseUserManager):
@@ -34,12 +36,43 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     created_at = models.DateTimeField(default=timezone.now) 
     is_guest = models.BooleanField(default=False)
+    # Pre-created guest waiting to be claimed by users.guest_pool.claim_guest
+    in_guest_pool = models.BooleanField(default=False)
 
     objects = CustomUserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['id', 'created_at'], condition=models.Q(is_guest=True), name='guest_user_id_idx'),
+            models.Index(fields=['id'], condition=models.Q(in_guest_pool=True), name='guest_pool_idx'),
+            models.Index(fields=['-created_at', '-id'], name='user_created_at_id_idx'),
+            # istartswith compiles to UPPER(col) LIKE UPPER('prefix%')
+            models.Index(OpClass(Upper('email'), name='text_pattern_ops'), name='user_email_prefix_idx'),
+            models.Index(OpClass(Upper('username'), name='text_pattern_ops'), name='user_username_prefix_idx'),
+        ]
+
     def __str__(self):
-        return self.username  
+        return self.username
+
+
+class ClaimsUser(CustomUser):
+    """
+    CustomUser built from access token claims. Only id, is_staff and is_guest
+    are set; the first access to any other field loads the rest in one query.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, is_staff, is_guest):
+        return cls.from_db('default', ['id', 'is_staff', 'is_guest'], [user_id, is_staff, is_guest])
 
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        deferred = self.get_deferred_fields()
+        if fields is not None and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
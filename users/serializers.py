@@ -13,4 +13,13 @@ class UserSerializer(serializers.ModelSerializer):
             email=validated_data['email'],
             username=validated_data['username'],
             password=validated_data['password']
-        )
\ No newline at end of file
+        )
+
+
+class AdminUserSerializer(serializers.ModelSerializer):
+    transaction_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'email', 'username', 'balance', 'created_at', 'is_staff', 'is_guest', 'is_active', 'transaction_count']
+        read_only_fields = fields
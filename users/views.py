@@ -5,25 +5,26 @@ from rest_framework import status
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import CustomUser
-from .serializers import UserSerializer
+from .serializers import AdminUserSerializer, UserSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 from rest_framework.permissions import IsAuthenticated
-import uuid
-import random
-import string
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from .models import CustomUser
-from .auth_serializers import AdminTokenObtainPairSerializer
+from .auth_serializers import AdminTokenObtainPairSerializer, add_user_claims
 from rest_framework.views import APIView
 from rest_framework import viewsets 
 from rest_framework.permissions import IsAdminUser
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .blacklist import FilteredRefreshToken, rotate
+from .guest_pool import claim_guest, create_guest
+from .listing import filter_users, listed_users, paginate_users, signup_stats
 
 class RegisterView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
@@ -33,7 +34,7 @@ class RegisterView(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = add_user_claims(RefreshToken.for_user(user), user)
         return Response({
             'refresh': str(refresh),
             'access': str(refresh.access_token),
@@ -44,6 +45,10 @@ class RegisterView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
         data['username'] = self.user.username
@@ -57,39 +62,37 @@ class LoginView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 class TokenRefreshView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
     def post(self, request):
         refresh_token = request.data.get('refresh')
         if not refresh_token:
             return Response({"detail": "Refresh token required"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            refresh = RefreshToken(refresh_token)
-            access_token = str(refresh.access_token)
-            return Response({"access": access_token})
+            refresh = FilteredRefreshToken(refresh_token)
+            data = {"access": str(refresh.access_token)}
+            if jwt_settings.ROTATE_REFRESH_TOKENS:
+                data["refresh"] = str(rotate(refresh))
+            return Response(data)
         except TokenError:
             return Response({"detail": "Invalid refresh token"}, status=status.HTTP_401_UNAUTHORIZED)
 class UserDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = UserSerializer(request.user)
+        # request.user may come from the per-token auth cache; the balance
+        # must be read fresh
+        user = CustomUser.objects.get(pk=request.user.pk)
+        serializer = UserSerializer(user)
         return Response(serializer.data)
 
-def random_suffix(n=6):
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=n))
-
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def guest_signup(request):
-    suffix = random_suffix()
-    user = CustomUser.objects.create_user(
-        email=f"guest-{uuid.uuid4()}@neo.finance",
-        username=f"Guest{suffix}",
-        password=None
-    )
-    user.is_guest = True
-    user.save()
-    refresh = RefreshToken.for_user(user)
+    user = claim_guest() or create_guest()
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
     return Response({
         'refresh': str(refresh),
         'access': str(refresh.access_token),
@@ -101,10 +104,15 @@ class AdminUserViewSet(viewsets.ViewSet):
     authentication_classes = [JWTAuthentication]
 
     def list(self, request):
+        users = filter_users(listed_users(), request.query_params)
+        page, next_cursor = paginate_users(users, request.query_params)
+        return Response({
+            'results': AdminUserSerializer(page, many=True).data,
+            'next_cursor': next_cursor,
+        })
 
-        users = CustomUser.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+    def stats(self, request):
+        return Response(signup_stats(listed_users()))
 
     def destroy(self, request, pk=None):
         try: